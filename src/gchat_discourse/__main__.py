@@ -2,34 +2,74 @@
 Main service module that coordinates all synchronization components.
 """
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 import threading
 import time
-from typing import Dict, Any
-
-import schedule
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Callable, Dict, Any, Hashable, Optional, Tuple
 
 from gchat_discourse.config_loader import Config
 from gchat_discourse.db import SyncDatabase
-from gchat_discourse.google_chat_client import GoogleChatClient
-from gchat_discourse.discourse_client import DiscourseClient
-from gchat_discourse.sync_gchat_to_discourse import GChatToDiscourseSync
-from gchat_discourse.sync_discourse_to_gchat import DiscourseToGChatSync
-from gchat_discourse.webhook_listener import WebhookListener
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[
+# The API clients, sync handlers and webhook listener pull in
+# googleapiclient, requests and Flask; they are imported where they are first
+# built, so --help and config errors exit without loading them.
+if TYPE_CHECKING:
+    from gchat_discourse.google_chat_client import GoogleChatClient
+    from gchat_discourse.discourse_client import DiscourseClient
+    from gchat_discourse.sync_gchat_to_discourse import GChatToDiscourseSync
+    from gchat_discourse.sync_discourse_to_gchat import DiscourseToGChatSync
+
+
+# sync_service.log is rotated at this size, keeping this many old files
+_LOG_MAX_BYTES = 10_000_000
+_LOG_BACKUPS = 3
+
+
+def _configure_logging():
+    """
+    Route log records through a queue to the console and file handlers.
+
+    Logging threads only enqueue records; a single listener thread does the
+    formatting and the (blocking) stream and file writes.
+    """
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    handlers = [
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler("sync_service.log"),
-    ],
-)
+        logging.handlers.RotatingFileHandler(
+            "sync_service.log", maxBytes=_LOG_MAX_BYTES, backupCount=_LOG_BACKUPS
+        ),
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Drain queued records on interpreter exit
+    atexit.register(listener.stop)
+
+
+# Setup logging
+_configure_logging()
 
 logger = logging.getLogger(__name__)
 
+# Webhook events that may wait for the event worker before new ones are refused
+_EVENT_QUEUE_SIZE = 10000
+
+# Seconds shutdown waits for the event worker to drain queued webhook events
+_EVENT_DRAIN_TIMEOUT = 30
+
+EventHandler = Callable[[str, Dict[str, Any]], None]
+
 
 class SyncService:
     """Main synchronization service coordinator."""
@@ -47,126 +87,313 @@ class SyncService:
         # Behavior flags (set early so other initialization can reference it)
         self.exit_on_error = exit_on_error
 
+        # Set on shutdown to wake and stop the scheduler thread
+        self._stop = threading.Event()
+
         # Load configuration
         self.config = Config(config_path)
 
         # Initialize database
         self.db = SyncDatabase()
 
-        # Initialize API clients
-        self.gchat_client = GoogleChatClient(
-            credentials_file=self.config.google_credentials_file,
-            token_file=self.config.google_token_file,
-        )
-
-        self.discourse_client = DiscourseClient(
-            url=self.config.discourse_url,
-            api_key=self.config.discourse_api_key,
-            api_username=self.config.discourse_username,
-        )
-        if self.exit_on_error:
-            # Make the Discourse client re-raise HTTP errors so the service
-            # exits when -E/--exit-on-error is specified.
-            self.discourse_client.raise_on_error = True
-
-        # Initialize sync handlers
-        self.gchat_to_discourse = GChatToDiscourseSync(
-            gchat_client=self.gchat_client,
-            discourse_client=self.discourse_client,
-            db=self.db,
-        )
-
-        self.discourse_to_gchat = DiscourseToGChatSync(
-            gchat_client=self.gchat_client,
-            discourse_client=self.discourse_client,
-            db=self.db,
-            api_username=self.config.discourse_username,
-        )
+        # API clients and sync handlers are created on first use, so paths
+        # that never touch Google Chat skip OAuth and service construction.
+        # The re-entrant lock lets a handler build the clients it needs.
+        self._init_lock = threading.RLock()
+        self._gchat_client: Optional["GoogleChatClient"] = None
+        self._discourse_client: Optional["DiscourseClient"] = None
+        self._gchat_to_discourse: Optional["GChatToDiscourseSync"] = None
+        self._discourse_to_gchat: Optional["DiscourseToGChatSync"] = None
 
         # Initialize webhook listener
+        from gchat_discourse.webhook_listener import WebhookListener
+
         self.webhook_listener = WebhookListener(
             host=self.config.webhook_host, port=self.config.webhook_port
         )
 
+        # Webhook events are acknowledged as soon as they are queued and
+        # synced in arrival order by one worker thread, so a slow Chat call
+        # never holds up Discourse's webhook request. A repeat of an event
+        # that is still queued replaces its payload instead of queueing again.
+        self._event_queue: "queue.Queue[Optional[Hashable]]" = queue.Queue(_EVENT_QUEUE_SIZE)
+        self._pending_events: Dict[Hashable, Tuple[EventHandler, str, Dict[str, Any]]] = {}
+        self._pending_lock = threading.Lock()
+        self._event_worker: Optional[threading.Thread] = None
+
+        # Set by a background thread that fails under exit_on_error; run()
+        # re-raises it once the webhook listener has been stopped.
+        self._fatal_error: Optional[BaseException] = None
+
         # Register webhook handlers
-        self.webhook_listener.register_post_handler(self._handle_post_event)
-        self.webhook_listener.register_topic_handler(self._handle_topic_event)
+        self.webhook_listener.register_post_handler(self._queue_post_event)
+        self.webhook_listener.register_topic_handler(self._queue_topic_event)
 
         logger.info("Sync service initialized successfully")
 
-    def initial_sync(self):
-        """Perform initial synchronization of configured spaces."""
-        logger.info("Starting initial synchronization...")
-
-        for mapping in self.config.space_mappings:
-            space_id = mapping.get("google_space_id")
-            category_id = mapping.get("discourse_category_id")
-            parent_category_id = mapping.get("discourse_parent_category_id")
+    @property
+    def gchat_client(self) -> "GoogleChatClient":
+        """Google Chat API client, authenticated on first use."""
+        if self._gchat_client is None:
+            with self._init_lock:
+                if self._gchat_client is None:
+                    from gchat_discourse.google_chat_client import GoogleChatClient
+
+                    self._gchat_client = GoogleChatClient(
+                        credentials_file=self.config.google_credentials_file,
+                        token_file=self.config.google_token_file,
+                        discovery_file=self.config.google_discovery_file,
+                        auth_mode=self.config.google_auth_mode,
+                        impersonate_user=self.config.google_impersonate_user,
+                    )
+        return self._gchat_client
+
+    @property
+    def discourse_client(self) -> "DiscourseClient":
+        """Discourse API client, created on first use."""
+        if self._discourse_client is None:
+            with self._init_lock:
+                if self._discourse_client is None:
+                    from gchat_discourse.discourse_client import DiscourseClient
+
+                    # Keep a pooled connection for every space sync worker
+                    # plus the webhook event worker.
+                    client = DiscourseClient(
+                        url=self.config.discourse_url,
+                        api_key=self.config.discourse_api_key,
+                        api_username=self.config.discourse_username,
+                        pool_maxsize=max(32, self.config.sync_workers + 1),
+                    )
+                    if self.exit_on_error:
+                        # Make the Discourse client re-raise HTTP errors so the service
+                        # exits when -E/--exit-on-error is specified.
+                        client.raise_on_error = True
+                    self._discourse_client = client
+        return self._discourse_client
+
+    @property
+    def gchat_to_discourse(self) -> "GChatToDiscourseSync":
+        """Google Chat -> Discourse sync handler, created on first use."""
+        if self._gchat_to_discourse is None:
+            with self._init_lock:
+                if self._gchat_to_discourse is None:
+                    from gchat_discourse.sync_gchat_to_discourse import GChatToDiscourseSync
+
+                    self._gchat_to_discourse = GChatToDiscourseSync(
+                        gchat_client=self.gchat_client,
+                        discourse_client=self.discourse_client,
+                        db=self.db,
+                        prefetch_workers=self.config.sync_workers,
+                    )
+        return self._gchat_to_discourse
+
+    @property
+    def discourse_to_gchat(self) -> "DiscourseToGChatSync":
+        """Discourse -> Google Chat sync handler, created on first use."""
+        if self._discourse_to_gchat is None:
+            with self._init_lock:
+                if self._discourse_to_gchat is None:
+                    from gchat_discourse.sync_discourse_to_gchat import DiscourseToGChatSync
+
+                    self._discourse_to_gchat = DiscourseToGChatSync(
+                        gchat_client=self.gchat_client,
+                        discourse_client=self.discourse_client,
+                        db=self.db,
+                        api_username=self.config.discourse_username,
+                    )
+        return self._discourse_to_gchat
 
-            if not space_id:
-                logger.warning(f"Skipping mapping with no space_id: {mapping}")
-                continue
+    def _sync_spaces(
+        self,
+        sync_one: Callable[[Dict[str, Any]], Optional[Tuple[str, int]]],
+        prefetch_spaces: bool = False,
+    ):
+        """
+        Run sync_one for every configured mapping on a bounded thread pool.
 
-            logger.info(f"Syncing space {space_id}...")
+        Each space is dominated by Google Chat and Discourse round-trips, so
+        spaces are synced concurrently rather than one after another. Mappings
+        come from the config's space ID index, which already dropped entries
+        without a space ID and duplicates.
 
+        Args:
+            sync_one: Syncs one mapping
+            prefetch_spaces: Batch-fetch every mapped space first; only worth
+                it when every space will call get_space
+        """
+        mappings = list(self.config.space_mapping_by_id.values())
+        if not mappings:
+            return
+
+        # Warm get_space's cache with batched requests instead of one
+        # round-trip per space. This is only an optimization, so on failure
+        # each space just fetches its own.
+        if prefetch_spaces:
             try:
-                # Sync space to category
-                result_category_id = self.gchat_to_discourse.sync_space_to_category(
-                    space_id=space_id,
-                    category_id=category_id,
-                    parent_category_id=parent_category_id,
-                )
-
-                if result_category_id:
-                    # Sync messages to posts
-                    synced_count = self.gchat_to_discourse.sync_messages_to_posts(
-                        space_id
-                    )
-                    logger.info(
-                        f"Synced {synced_count} messages from space {space_id}"
-                    )
-                else:
-                    logger.error(f"Failed to sync space {space_id}")
+                self.gchat_client.get_spaces_batch(list(self.config.space_mapping_by_id))
             except Exception as e:
-                logger.error(
-                    f"Error syncing space {space_id}: {e}", exc_info=True
-                )
-                if self.exit_on_error:
-                    raise
-                # otherwise continue with next mapping
-                continue
+                logger.warning("Could not prefetch spaces, fetching them individually: %s", e)
+
+        workers = max(1, min(self.config.sync_workers, len(mappings)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="space-sync") as executor:
+            futures = [executor.submit(sync_one, mapping) for mapping in mappings]
+            try:
+                for future in as_completed(futures):
+                    # Errors are logged per space; with exit_on_error the first
+                    # one propagates from here.
+                    future.result()
+            except BaseException:
+                # Don't start the spaces still waiting for a worker; only the
+                # ones already in flight are waited for on the way out.
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
 
+    def _sync_one_mapping(self, mapping: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+        """Initial sync of one mapping; returns (space_id, synced_count) on success."""
+        space_id = mapping["google_space_id"]
+        category_id = mapping.get("discourse_category_id")
+        parent_category_id = mapping.get("discourse_parent_category_id")
+
+        logger.info(f"Syncing space {space_id}...")
+
+        try:
+            # Sync space to category
+            result_category_id = self.gchat_to_discourse.sync_space_to_category(
+                space_id=space_id,
+                category_id=category_id,
+                parent_category_id=parent_category_id,
+            )
+
+            if not result_category_id:
+                logger.error(f"Failed to sync space {space_id}")
+                return None
+
+            # Sync messages to posts
+            synced_count = self.gchat_to_discourse.sync_messages_to_posts(space_id)
+            logger.info(f"Synced {synced_count} messages from space {space_id}")
+            return space_id, synced_count
+        except Exception as e:
+            logger.error(f"Error syncing space {space_id}: {e}", exc_info=True)
+            if self.exit_on_error:
+                raise
+            # otherwise continue with the other mappings
+            return None
+
+    def _catch_up_one_mapping(
+        self, mapping: Dict[str, Any], last_sync_times: Optional[Dict[str, str]] = None
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Periodic catch-up of one mapping; returns (space_id, synced_count) on success.
+
+        last_sync_times, when given, holds the timestamps periodic_sync read
+        for every space up front; otherwise this space's is looked up.
+        """
+        from gchat_discourse.sync_gchat_to_discourse import cursor_covers
+
+        space_id = mapping["google_space_id"]
+        try:
+            # Get last sync time
+            if last_sync_times is not None:
+                last_sync = last_sync_times.get(space_id)
+            else:
+                last_sync = self.db.get_last_sync_time(space_id)
+
+            # Cheap probe: if the newest message is already mapped and the
+            # cursor has reached it, nothing is new and nothing older is
+            # waiting for a retry, so the full catch-up can be skipped. A
+            # cursor held back by a failed message keeps the space syncing.
+            latest = self.gchat_client.get_latest_message(space_id)
+            if (
+                latest is not None
+                and self.db.get_post_id(latest.get("name", "")) is not None
+                and cursor_covers(last_sync, latest.get("createTime"))
+            ):
+                logger.debug("Periodic sync: no new messages in %s", space_id)
+                return space_id, 0
+
+            # Sync messages since last sync
+            synced_count = self.gchat_to_discourse.sync_messages_to_posts(
+                space_id=space_id, since_timestamp=last_sync
+            )
+
+            logger.info(f"Periodic sync: {synced_count} new messages from {space_id}")
+            return space_id, synced_count
+        except Exception as e:
+            logger.error(f"Error in periodic sync for {space_id}: {e}", exc_info=True)
+            if self.exit_on_error:
+                raise
+            return None
+
+    def initial_sync(self):
+        """Perform initial synchronization of configured spaces."""
+        logger.info("Starting initial synchronization...")
+        # Every space's initial sync starts with get_space. Catch-up sweeps
+        # don't prefetch: most spaces are skipped by the idle probe before
+        # they would fetch their space.
+        self._sync_spaces(self._sync_one_mapping, prefetch_spaces=True)
         logger.info("Initial synchronization complete")
 
     def periodic_sync(self):
         """Perform periodic catch-up synchronization."""
         logger.info("Running periodic catch-up sync...")
+        last_sync_times = self.db.get_last_sync_times(self.config.space_mapping_by_id)
+        self._sync_spaces(lambda mapping: self._catch_up_one_mapping(mapping, last_sync_times))
+        logger.info("Periodic catch-up sync complete")
 
-        for mapping in self.config.space_mappings:
-            space_id = mapping.get("google_space_id")
-            if not space_id:
-                continue
+    def _queue_post_event(self, event_name: str, post_data: Dict[str, Any]):
+        """Queue a post event from the Discourse webhook for the event worker."""
+        # Echoes of posts this service wrote itself are dropped before they
+        # queue behind real work. Every post we create or map is in the
+        # database's write-through post cache, so this is normally a dict hit.
+        post_id = post_data.get("id")
+        if post_id is not None and self.db.get_message_id(post_id):
+            logger.debug("Ignoring %s event for post %s synced from Google Chat", event_name, post_id)
+            return
+        self._queue_event(self._handle_post_event, "post", event_name, post_data)
+
+    def _queue_topic_event(self, event_name: str, topic_data: Dict[str, Any]):
+        """Queue a topic event from the Discourse webhook for the event worker."""
+        self._queue_event(self._handle_topic_event, "topic", event_name, topic_data)
+
+    def _queue_event(
+        self, handler: EventHandler, kind: str, event_name: str, data: Dict[str, Any]
+    ):
+        """
+        Queue a webhook event, coalescing it with a queued event for the same item.
 
+        Raises queue.Full when the queue is at capacity, so the webhook
+        answers with an error and Discourse redelivers the event later.
+        """
+        item_id = data.get("id")
+        key: Hashable = (kind, event_name, item_id) if item_id is not None else object()
+        with self._pending_lock:
+            if key in self._pending_events:
+                # Still queued: the newest payload wins
+                self._pending_events[key] = (handler, event_name, data)
+                logger.debug("Coalesced queued %s %s event for %s", kind, event_name, item_id)
+                return
             try:
-                # Get last sync time
-                last_sync = self.db.get_last_sync_time(space_id)
-
-                # Sync messages since last sync
-                synced_count = self.gchat_to_discourse.sync_messages_to_posts(
-                    space_id=space_id, since_timestamp=last_sync
-                )
+                self._event_queue.put_nowait(key)
+            except queue.Full:
+                logger.error("Webhook event queue is full; dropping %s %s event", kind, event_name)
+                raise
+            self._pending_events[key] = (handler, event_name, data)
 
-                logger.info(
-                    f"Periodic sync: {synced_count} new messages from {space_id}"
-                )
+    def _run_event_worker(self):
+        """Sync queued webhook events one at a time until the None sentinel."""
+        while True:
+            key = self._event_queue.get()
+            if key is None:
+                return
+            with self._pending_lock:
+                handler, event_name, data = self._pending_events.pop(key)
+            try:
+                handler(event_name, data)
             except Exception as e:
-                logger.error(
-                    f"Error in periodic sync for {space_id}: {e}", exc_info=True
-                )
-                if self.exit_on_error:
-                    raise
-
-        logger.info("Periodic catch-up sync complete")
+                # Handlers log their own errors and only re-raise under
+                # exit_on_error, which stops the service
+                self._fail(e)
+                return
 
     def _handle_post_event(self, event_name: str, post_data: Dict[str, Any]):
         """Handle post events from Discourse webhook."""
@@ -203,12 +430,40 @@ class SyncService:
         """Run the periodic sync scheduler in a separate thread."""
         logger.info("Starting scheduler thread...")
 
-        # Schedule periodic sync
-        schedule.every(self.config.poll_interval_minutes).minutes.do(self.periodic_sync)
-
-        while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+        # Polls are due on a fixed monotonic schedule, so the time a sync
+        # takes does not push every later poll back. wait() returns early
+        # (True) once the service is stopping.
+        interval = self.config.poll_interval_minutes * 60
+        next_run = time.monotonic() + interval
+        while not self._stop.wait(max(0.0, next_run - time.monotonic())):
+            try:
+                self.periodic_sync()
+            except Exception as e:
+                logger.error(f"Periodic sync failed: {e}", exc_info=True)
+                if self.exit_on_error:
+                    self._fail(e)
+                    return
+            # Skip any polls a long sync overran rather than running them back to back
+            now = time.monotonic()
+            next_run += interval
+            if next_run <= now:
+                next_run += ((now - next_run) // interval + 1) * interval
+
+    def _fail(self, error: BaseException):
+        """Record a background thread's fatal error and stop the webhook listener."""
+        self._fatal_error = error
+        self.webhook_listener.shutdown()
+
+    def _stop_event_worker(self):
+        """Let the event worker finish the events already queued, then stop it."""
+        try:
+            self._event_queue.put(None, timeout=_EVENT_DRAIN_TIMEOUT)
+        except queue.Full:
+            logger.warning("Webhook event queue did not drain; abandoning queued events")
+            return
+        self._event_worker.join(_EVENT_DRAIN_TIMEOUT)
+        if self._event_worker.is_alive():
+            logger.warning("Webhook event worker is still busy; abandoning queued events")
 
     def run(self):
         """Start the sync service."""
@@ -222,9 +477,17 @@ class SyncService:
             scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
             scheduler_thread.start()
 
+            # Start the worker that syncs queued webhook events
+            self._event_worker = threading.Thread(
+                target=self._run_event_worker, name="webhook-events", daemon=True
+            )
+            self._event_worker.start()
+
             # Start webhook listener (blocking)
             logger.info("Starting webhook listener...")
             self.webhook_listener.run()
+            if self._fatal_error is not None:
+                raise self._fatal_error
 
         except KeyboardInterrupt:
             logger.info("Shutting down sync service...")
@@ -234,6 +497,13 @@ class SyncService:
                 # Re-raise so the process can exit with non-zero status
                 raise
         finally:
+            self._stop.set()
+            if self._event_worker is not None:
+                self._stop_event_worker()
+            if self._gchat_to_discourse is not None:
+                self._gchat_to_discourse.close()
+            if self._discourse_client is not None:
+                self._discourse_client.close()
             self.db.close()
             logger.info("Sync service stopped")
 
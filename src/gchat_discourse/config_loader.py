@@ -2,16 +2,84 @@
 Configuration loader module for reading and validating config.yaml.
 """
 
+import copy
+import os
 import yaml
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+# Prefer libyaml's C loader and dumper when PyYAML was built with them; they
+# run an order of magnitude faster than the pure-Python SafeLoader/SafeDumper
+# with identical semantics. The mapping scripts use both to rewrite configs.
+try:
+    from yaml import CSafeDumper as YamlDumper, CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeDumper as YamlDumper, SafeLoader as YamlLoader  # type: ignore[assignment]
 
 logger = logging.getLogger(__name__)
 
+# Parsed config documents keyed by path, with the (mtime_ns, size) they were
+# parsed at. Configs sharing an unchanged file skip the YAML parse but each
+# get a deep copy, so edits to one Config's document never leak into another.
+_CONFIG_CACHE: Dict[str, Tuple[Tuple[int, int], Any]] = {}
+
+# Required sections and the fields each must contain, resolved once at import.
+_REQUIRED_FIELDS = (
+    ('discourse', ('url', 'api_key', 'api_username')),
+    ('google', ('credentials_file', 'token_file')),
+    ('sync_settings', ('poll_interval_minutes',)),
+    ('mappings', ()),
+)
+
 
 class Config:
     """Configuration manager for the sync service."""
 
+    # Settings are resolved once at load time into plain slot attributes:
+    # reading one is a single slot load, with no property call in between.
+    __slots__ = (
+        'config_path',
+        'config',
+        'discourse_url',
+        'discourse_api_key',
+        'discourse_username',
+        'google_credentials_file',
+        'google_token_file',
+        'google_discovery_file',
+        'google_auth_mode',
+        'google_impersonate_user',
+        'pubsub_project_id',
+        'pubsub_subscription_id',
+        'poll_interval_minutes',
+        'webhook_host',
+        'webhook_port',
+        'sync_workers',
+        'space_mappings',
+        'space_mapping_by_id',
+    )
+
+    # Discourse configuration
+    discourse_url: str
+    discourse_api_key: str
+    discourse_username: str
+    # Google configuration
+    google_credentials_file: str
+    google_token_file: str
+    google_discovery_file: Optional[str]
+    google_auth_mode: str
+    google_impersonate_user: Optional[str]
+    pubsub_project_id: Optional[str]
+    pubsub_subscription_id: Optional[str]
+    # Sync settings
+    poll_interval_minutes: int
+    webhook_host: str
+    webhook_port: int
+    sync_workers: int
+    # Mappings
+    space_mappings: List[Dict[str, Any]]
+    # Mappings with a google_space_id, keyed by it (first entry wins)
+    space_mapping_by_id: Dict[str, Dict[str, Any]]
+
     def __init__(self, config_path: str = "config.yaml"):
         """
         Load configuration from YAML file.
@@ -22,14 +90,23 @@ class Config:
         self.config_path = config_path
         self.config = self._load_config()
         self._validate_config()
+        self._cache_values()
 
     def _load_config(self) -> Dict[str, Any]:
         """Load the YAML configuration file."""
         try:
-            with open(self.config_path, 'r') as f:
-                config = yaml.safe_load(f)
+            st = os.stat(self.config_path)
+            version = (st.st_mtime_ns, st.st_size)
+            cached = _CONFIG_CACHE.get(self.config_path)
+            if cached is not None and cached[0] == version:
+                logger.debug(f"Configuration unchanged, reusing parsed {self.config_path}")
+                return copy.deepcopy(cached[1])
+
+            with open(self.config_path, 'rb') as f:
+                config = yaml.load(f, Loader=YamlLoader)
+            _CONFIG_CACHE[self.config_path] = (version, config)
             logger.info(f"Configuration loaded from {self.config_path}")
-            return config
+            return copy.deepcopy(config)
         except FileNotFoundError:
             logger.error(f"Configuration file not found: {self.config_path}")
             raise
@@ -39,88 +116,75 @@ class Config:
 
     def _validate_config(self):
         """Validate that required configuration fields are present."""
-        required_fields = {
-            'discourse': ['url', 'api_key', 'api_username'],
-            'google': ['credentials_file', 'token_file'],
-            'sync_settings': ['poll_interval_minutes'],
-            'mappings': []
-        }
-
-        for section, fields in required_fields.items():
-            if section not in self.config:
+        config = self.config
+        if not isinstance(config, dict):
+            raise ValueError("Configuration file must contain a mapping at the top level")
+
+        for section, fields in _REQUIRED_FIELDS:
+            if section not in config:
                 raise ValueError(f"Missing required configuration section: {section}")
-            
+
+            present = config[section] or {}
             for field in fields:
-                if field not in self.config[section]:
+                if field not in present:
                     raise ValueError(f"Missing required field '{field}' in section '{section}'")
 
+        # The scheduler divides by the interval and sleeps for it between polls
+        interval = config['sync_settings']['poll_interval_minutes']
+        if isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval <= 0:
+            raise ValueError(
+                f"'poll_interval_minutes' in section 'sync_settings' must be a positive number, got {interval!r}"
+            )
+
+        # Sizes the per-sweep thread pool and the page prefetch pool
+        workers = config['sync_settings'].get('sync_workers', 8)
+        if isinstance(workers, bool) or not isinstance(workers, int) or workers <= 0:
+            raise ValueError(
+                f"'sync_workers' in section 'sync_settings' must be a positive integer, got {workers!r}"
+            )
+
         if not self.config.get('mappings'):
             logger.warning("No space mappings defined in configuration")
 
         logger.info("Configuration validation passed")
 
-    # Discourse configuration
-    @property
-    def discourse_url(self) -> str:
-        """Get the Discourse URL."""
-        return self.config['discourse']['url']
-
-    @property
-    def discourse_api_key(self) -> str:
-        """Get the Discourse API key."""
-        return self.config['discourse']['api_key']
-
-    @property
-    def discourse_username(self) -> str:
-        """Get the Discourse username."""
-        return self.config['discourse']['api_username']
-
-    # Google configuration
-    @property
-    def google_credentials_file(self) -> str:
-        """Get the Google credentials file path."""
-        return self.config['google']['credentials_file']
-
-    @property
-    def google_token_file(self) -> str:
-        """Get the Google token file path."""
-        return self.config['google']['token_file']
-
-    @property
-    def pubsub_project_id(self) -> Optional[str]:
-        """Get the Google Cloud Pub/Sub project ID."""
-        return self.config['google'].get('pubsub', {}).get('project_id')
-
-    @property
-    def pubsub_subscription_id(self) -> Optional[str]:
-        """Get the Google Cloud Pub/Sub subscription ID."""
-        return self.config['google'].get('pubsub', {}).get('subscription_id')
-
-    # Sync settings
-    @property
-    def poll_interval_minutes(self) -> int:
-        """Get the polling interval in minutes."""
-        return self.config['sync_settings']['poll_interval_minutes']
-
-    @property
-    def webhook_host(self) -> str:
-        """Get the webhook listener host."""
-        return self.config['sync_settings'].get('webhook_host', '0.0.0.0')
-
-    @property
-    def webhook_port(self) -> int:
-        """Get the webhook listener port."""
-        return self.config['sync_settings'].get('webhook_port', 5000)
-
-    # Mappings
-    @property
-    def space_mappings(self) -> List[Dict[str, Any]]:
-        """Get the list of space-to-category mappings."""
-        return self.config.get('mappings', [])
+    def _cache_values(self):
+        """Resolve frequently read settings once into instance attributes."""
+        discourse = self.config['discourse']
+        google = self.config['google']
+        pubsub = google.get('pubsub', {})
+        sync_settings = self.config['sync_settings']
+
+        self.discourse_url = discourse['url']
+        self.discourse_api_key = discourse['api_key']
+        self.discourse_username = discourse['api_username']
+        self.google_credentials_file = google['credentials_file']
+        self.google_token_file = google['token_file']
+        self.google_discovery_file = google.get('discovery_file')
+        self.google_auth_mode = google.get('auth_mode', 'oauth')
+        self.google_impersonate_user = google.get('impersonate_user')
+        self.pubsub_project_id = pubsub.get('project_id')
+        self.pubsub_subscription_id = pubsub.get('subscription_id')
+        self.poll_interval_minutes = sync_settings['poll_interval_minutes']
+        self.webhook_host = sync_settings.get('webhook_host', '0.0.0.0')
+        self.webhook_port = sync_settings.get('webhook_port', 5000)
+        self.sync_workers = sync_settings.get('sync_workers', 8)
+        self.space_mappings = self.config.get('mappings') or []
+
+        # Index mappings by space ID once, so syncs iterate the index instead
+        # of re-filtering the list every sweep. The first entry wins, matching
+        # the previous linear scan in get_mapping_for_space.
+        self.space_mapping_by_id = {}
+        for mapping in self.space_mappings:
+            space_id = mapping.get('google_space_id')
+            if not space_id:
+                logger.warning(f"Skipping mapping with no google_space_id: {mapping}")
+                continue
+            if space_id in self.space_mapping_by_id:
+                logger.warning(f"Ignoring duplicate mapping for space {space_id}")
+                continue
+            self.space_mapping_by_id[space_id] = mapping
 
     def get_mapping_for_space(self, space_id: str) -> Optional[Dict[str, Any]]:
         """Get the mapping configuration for a specific space."""
-        for mapping in self.space_mappings:
-            if mapping.get('google_space_id') == space_id:
-                return mapping
-        return None
+        return self.space_mapping_by_id.get(space_id)
@@ -5,14 +5,209 @@ Uses SQLite to maintain state between Google Chat and Discourse.
 
 import sqlite3
 import logging
-from typing import Optional
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from gchat_discourse.cache import LRUCache
 
 logger = logging.getLogger(__name__)
 
+# Connection tuning: WAL lets readers proceed while a write is in progress and
+# synchronous=NORMAL only fsyncs at checkpoints rather than on every commit.
+# Reads go through a shared memory map instead of per-connection copies (the
+# page cache stays modest because every thread has its own connection), and a
+# writer that finds the database locked waits up to 5s instead of failing.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Upper bound on entries held by each in-process lookup cache.
+_CACHE_SIZE = 10000
+
+# Prepared statements each connection keeps compiled. The default (128) is
+# plenty today; the headroom keeps every hot statement resident as more are
+# added.
+_CACHED_STATEMENTS = 256
+
+# SQL statements are kept as module-level constants so sqlite3's statement
+# cache sees the same string on every call and reuses the compiled plan.
+# Writes are upserts (SQLite 3.24+): unlike INSERT OR REPLACE, an existing
+# row is updated in place instead of deleted and re-inserted, so its
+# created_at survives and a no-op remap rewrites one row, not two.
+_SQL_ADD_SPACE_CATEGORY = """
+    INSERT INTO space_to_category (google_space_id, discourse_category_id)
+    VALUES (?, ?)
+    ON CONFLICT (google_space_id) DO UPDATE SET
+        discourse_category_id = excluded.discourse_category_id
+"""
+_SQL_GET_CATEGORY_ID = """
+    SELECT discourse_category_id FROM space_to_category WHERE google_space_id = ?
+"""
+_SQL_GET_SPACE_ID = """
+    SELECT google_space_id FROM space_to_category WHERE discourse_category_id = ?
+"""
+_SQL_ADD_THREAD_TOPIC = """
+    INSERT INTO thread_to_topic (google_thread_id, discourse_topic_id, google_space_id)
+    VALUES (?, ?, ?)
+    ON CONFLICT (google_thread_id) DO UPDATE SET
+        discourse_topic_id = excluded.discourse_topic_id,
+        google_space_id = excluded.google_space_id
+"""
+_SQL_GET_TOPIC_ID = """
+    SELECT discourse_topic_id FROM thread_to_topic WHERE google_thread_id = ?
+"""
+_SQL_GET_THREAD_ID = """
+    SELECT google_thread_id FROM thread_to_topic WHERE discourse_topic_id = ?
+"""
+_SQL_ADD_MESSAGE_POST = """
+    INSERT INTO message_to_post (google_message_id, discourse_post_id, google_thread_id)
+    VALUES (?, ?, ?)
+    ON CONFLICT (google_message_id) DO UPDATE SET
+        discourse_post_id = excluded.discourse_post_id,
+        google_thread_id = excluded.google_thread_id
+"""
+_SQL_GET_POST_ID = """
+    SELECT discourse_post_id FROM message_to_post WHERE google_message_id = ?
+"""
+_SQL_GET_MESSAGE_ID = """
+    SELECT google_message_id FROM message_to_post WHERE discourse_post_id = ?
+"""
+_SQL_GET_MESSAGE_IDS_IN_RANGE = """
+    SELECT google_message_id FROM message_to_post
+    WHERE google_message_id >= ? AND google_message_id < ?
+"""
+_SQL_UPDATE_SYNC_TIME = """
+    INSERT INTO sync_state (space_id, last_sync_timestamp, updated_at)
+    VALUES (?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (space_id) DO UPDATE SET
+        last_sync_timestamp = excluded.last_sync_timestamp,
+        updated_at = excluded.updated_at
+"""
+_SQL_GET_SYNC_TIME = """
+    SELECT last_sync_timestamp FROM sync_state WHERE space_id = ?
+"""
+_SQL_GET_SYNC_TIMES = """
+    SELECT space_id, last_sync_timestamp FROM sync_state
+"""
+_SQL_ADD_USER = """
+    INSERT INTO user_mapping
+    (gchat_user_id, discourse_username, gchat_display_name, gchat_email, updated_at)
+    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (gchat_user_id) DO UPDATE SET
+        discourse_username = excluded.discourse_username,
+        gchat_display_name = excluded.gchat_display_name,
+        gchat_email = excluded.gchat_email,
+        updated_at = excluded.updated_at
+"""
+_SQL_GET_DISCOURSE_USERNAME = """
+    SELECT discourse_username FROM user_mapping WHERE gchat_user_id = ?
+"""
+_SQL_GET_GCHAT_USER_ID = """
+    SELECT gchat_user_id FROM user_mapping WHERE discourse_username = ?
+"""
+_SQL_ADD_DM_CHANNEL = """
+    INSERT INTO dm_space_to_chat_channel (google_space_id, discourse_chat_channel_id)
+    VALUES (?, ?)
+    ON CONFLICT (google_space_id) DO UPDATE SET
+        discourse_chat_channel_id = excluded.discourse_chat_channel_id
+"""
+_SQL_GET_DM_CHANNEL_ID = """
+    SELECT discourse_chat_channel_id FROM dm_space_to_chat_channel WHERE google_space_id = ?
+"""
+_SQL_GET_DM_SPACE_ID = """
+    SELECT google_space_id FROM dm_space_to_chat_channel WHERE discourse_chat_channel_id = ?
+"""
+
+# Most recently inserted rows of each cached table, oldest first, used to warm
+# the in-memory caches when the database is opened.
+_SQL_WARM_CATEGORY = """
+    SELECT google_space_id, discourse_category_id FROM (
+        SELECT rowid, google_space_id, discourse_category_id FROM space_to_category
+        ORDER BY rowid DESC LIMIT ?
+    ) ORDER BY rowid
+"""
+_SQL_WARM_TOPIC = """
+    SELECT google_thread_id, discourse_topic_id FROM (
+        SELECT rowid, google_thread_id, discourse_topic_id FROM thread_to_topic
+        ORDER BY rowid DESC LIMIT ?
+    ) ORDER BY rowid
+"""
+_SQL_WARM_POST = """
+    SELECT google_message_id, discourse_post_id FROM (
+        SELECT rowid, google_message_id, discourse_post_id FROM message_to_post
+        ORDER BY rowid DESC LIMIT ?
+    ) ORDER BY rowid
+"""
+
+
+# Stand-in row for lookups that match nothing
+_NO_ROW = (None,)
+
+
+class _Mapping:
+    """
+    One Google ID <-> Discourse ID mapping table: its SQL and lookup caches.
+
+    Every mapping table stores the Google ID as its key column and the
+    Discourse ID (or username) as the second column of its INSERT, so the
+    same add/get/reverse code serves them all. Only hits are cached, so a
+    miss (e.g. a webhook for a post we did not create) still asks SQLite.
+    """
+
+    __slots__ = ("add_sql", "get_sql", "reverse_sql", "forward", "reverse")
+
+    def __init__(self, add_sql: str, get_sql: str, reverse_sql: str):
+        self.add_sql = add_sql
+        self.get_sql = get_sql
+        self.reverse_sql = reverse_sql
+        self.forward: LRUCache = LRUCache(_CACHE_SIZE)
+        self.reverse: LRUCache = LRUCache(_CACHE_SIZE)
+
+
+class _ThreadConnection:
+    """A thread's connection, held in thread-local storage.
+
+    Thread-local values are released when their thread exits, and a
+    finalizer on this holder then closes the connection, so short-lived
+    worker and request threads do not leave connections open.
+    """
+
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+def _release_connection(
+    conn: sqlite3.Connection, connections: Set[sqlite3.Connection], lock: threading.Lock
+):
+    """Close a connection whose thread has exited and forget it."""
+    with lock:
+        connections.discard(conn)
+    conn.close()
+
 
 class SyncDatabase:
     """Manages the SQLite database for sync state."""
-    conn: sqlite3.Connection
+
+    __slots__ = (
+        "db_path",
+        "_local",
+        "_connections",
+        "_connections_lock",
+        "_categories",
+        "_topics",
+        "_posts",
+        "_users",
+        "_dm_channels",
+    )
 
     def __init__(self, db_path: str = "sync_db.sqlite"):
         """
@@ -22,11 +217,54 @@ class SyncDatabase:
             db_path: Path to the SQLite database file
         """
         self.db_path = db_path
+        # Each thread gets its own connection (and batch() depth), so the
+        # webhook and polling threads do not serialize on one connection's
+        # mutex; WAL lets their readers run alongside a writer.
+        self._local = threading.local()
+        # Every connection still open, so close() can close them all
+        self._connections: Set[sqlite3.Connection] = set()
+        self._connections_lock = threading.Lock()
+        # Write-through caches for the lookups made for every synced message
+        # and webhook, one per direction of each mapping table
+        self._categories = _Mapping(_SQL_ADD_SPACE_CATEGORY, _SQL_GET_CATEGORY_ID, _SQL_GET_SPACE_ID)
+        self._topics = _Mapping(_SQL_ADD_THREAD_TOPIC, _SQL_GET_TOPIC_ID, _SQL_GET_THREAD_ID)
+        self._posts = _Mapping(_SQL_ADD_MESSAGE_POST, _SQL_GET_POST_ID, _SQL_GET_MESSAGE_ID)
+        self._users = _Mapping(_SQL_ADD_USER, _SQL_GET_DISCOURSE_USERNAME, _SQL_GET_GCHAT_USER_ID)
+        self._dm_channels = _Mapping(_SQL_ADD_DM_CHANNEL, _SQL_GET_DM_CHANNEL_ID, _SQL_GET_DM_SPACE_ID)
         self._initialize_db()
+        self._warm_caches()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """The calling thread's connection, opened on first use."""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            return self._connect()
+        return holder.conn
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open and register a connection for the calling thread."""
+        # check_same_thread is off only so close() can close connections
+        # opened by other threads; each one is otherwise used by its own
+        # thread alone.
+        conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, cached_statements=_CACHED_STATEMENTS
+        )
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        holder = _ThreadConnection(conn)
+        weakref.finalize(
+            holder, _release_connection, conn, self._connections, self._connections_lock
+        )
+        self._local.holder = holder
+        # Depth of nested batch() blocks; writes only commit at depth 0.
+        self._local.batch_depth = 0
+        with self._connections_lock:
+            self._connections.add(conn)
+        return conn
 
     def _initialize_db(self):
         """Create the database and tables if they don't exist."""
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         cursor = self.conn.cursor()
 
         # Table to map Google Chat spaces to Discourse categories
@@ -90,178 +328,321 @@ class SyncDatabase:
             )
         """)
 
+        # Indexes for the reverse (Discourse ID -> Google ID) lookups. These
+        # are not UNIQUE: several spaces may share a category, DM chat
+        # message IDs share message_to_post with post IDs, and existing
+        # databases may already hold duplicate usernames.
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_space_to_category_category
+            ON space_to_category(discourse_category_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_thread_to_topic_topic
+            ON thread_to_topic(discourse_topic_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_message_to_post_post
+            ON message_to_post(discourse_post_id)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_user_mapping_username
+            ON user_mapping(discourse_username)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_dm_space_to_chat_channel_channel
+            ON dm_space_to_chat_channel(discourse_chat_channel_id)
+        """)
+
         self.conn.commit()
         logger.info(f"Database initialized at {self.db_path}")
 
-    # Space to Category mappings
-    def add_space_category_mapping(self, google_space_id: str, discourse_category_id: int):
-        """Add or update a space-to-category mapping."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO space_to_category (google_space_id, discourse_category_id)
-            VALUES (?, ?)
-        """, (google_space_id, discourse_category_id))
+    def _warm_caches(self):
+        """
+        Preload the lookup caches from SQLite.
+
+        A restart otherwise sends every message in the first poll back to
+        SQLite; this does one sequential scan per table instead. Only the most
+        recently inserted rows are loaded, up to each cache's capacity.
+        """
+        for sql, mapping in (
+            (_SQL_WARM_CATEGORY, self._categories),
+            (_SQL_WARM_TOPIC, self._topics),
+            (_SQL_WARM_POST, self._posts),
+        ):
+            for key, value in self.conn.execute(sql, (mapping.forward.maxsize,)):
+                mapping.forward.set(key, value)
+                mapping.reverse.set(value, key)
+
+    def _fetch_value(self, sql: str, params: Tuple):
+        """Run a single-column lookup and return the value or None."""
+        # Lookups are by primary key or an indexed column, so the first row
+        # is the answer; next() skips fetchone()'s method call and the
+        # truthiness check on the row.
+        return next(self.conn.execute(sql, params), _NO_ROW)[0]
+
+    def _lookup(self, cache: LRUCache, sql: str, key):
+        """Return the cached value for key, querying SQLite and caching it on a miss."""
+        value = cache.get(key)
+        if value is None:
+            value = self._fetch_value(sql, (key,))
+            if value is not None:
+                cache.set(key, value)
+        return value
+
+    def _get(self, mapping: _Mapping, key):
+        """Look up the Discourse side of a mapping by its Google ID."""
+        return self._lookup(mapping.forward, mapping.get_sql, key)
+
+    def _get_reverse(self, mapping: _Mapping, value):
+        """Look up the Google side of a mapping by its Discourse ID."""
+        return self._lookup(mapping.reverse, mapping.reverse_sql, value)
+
+    def _evict_replaced(self, mapping: _Mapping, key, value):
+        """
+        Drop the reverse cache entry for the value a write is about to replace.
+
+        Called before a key is remapped, so a lookup of the Discourse/Google ID
+        it used to map to cannot return key from the cache afterwards.
+        """
+        old = self._get(mapping, key)
+        if old is not None and old != value and mapping.reverse.get(old) == key:
+            mapping.reverse.pop(old)
+
+    def _put(self, mapping: _Mapping, row: Tuple):
+        """Store one mapping row and cache it in both directions."""
+        key, value = row[0], row[1]
+        self._evict_replaced(mapping, key, value)
+        self._write(mapping.add_sql, row)
+        mapping.forward.set(key, value)
+        mapping.reverse.set(value, key)
+
+    def _put_many(self, mapping: _Mapping, rows: Iterable[Tuple]):
+        """Store many mapping rows in one executemany and cache them."""
+        rows = list(rows)
+        for row in rows:
+            self._evict_replaced(mapping, row[0], row[1])
+        for row in self._write_many(mapping.add_sql, rows):
+            mapping.forward.set(row[0], row[1])
+            mapping.reverse.set(row[1], row[0])
+
+    def _write(self, sql: str, params: Tuple):
+        """Execute a write, committing immediately unless inside batch()."""
+        conn = self.conn
+        conn.execute(sql, params)
+        if not self._local.batch_depth:
+            conn.commit()
+
+    def _write_many(self, sql: str, rows: Iterable[Tuple]) -> List[Tuple]:
+        """
+        Execute a write for each row in one transaction.
+
+        The statement is prepared once and all rows share a single commit
+        (deferred to the enclosing batch() if there is one). Returns the rows
+        as a list so callers can update their caches from them.
+        """
+        rows = list(rows)
+        conn = self.conn
+        conn.executemany(sql, rows)
+        if not self._local.batch_depth:
+            conn.commit()
+        return rows
+
+    @contextmanager
+    def batch(self) -> Iterator["SyncDatabase"]:
+        """
+        Group writes into a single transaction.
+
+        Writes the calling thread makes inside the block are committed once
+        when its outermost batch exits. They are committed even if the block raises, since each
+        mapping records a change that already happened on a remote service.
+
+        The outermost batch starts with BEGIN IMMEDIATE, taking the write lock
+        up front so its writes cannot fail halfway on a lock upgrade. Other
+        threads' writers wait for it, so keep network calls out of the block.
+        """
+        conn = self.conn
+        local = self._local
+        if not local.batch_depth and not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        local.batch_depth += 1
+        try:
+            yield self
+        finally:
+            local.batch_depth -= 1
+            if not local.batch_depth:
+                conn.commit()
+
+    def commit(self):
+        """Commit any pending writes."""
         self.conn.commit()
-        logger.debug(f"Added mapping: {google_space_id} -> category {discourse_category_id}")
+
+    # Space to Category mappings
+    def add_space_category_mapping(self, google_space_id: str, discourse_category_id: int) -> int:
+        """Add or update a space-to-category mapping and return the stored category ID."""
+        self._put(self._categories, (google_space_id, discourse_category_id))
+        logger.debug("Added mapping: %s -> category %s", google_space_id, discourse_category_id)
+        return discourse_category_id
+
+    def add_space_category_mappings(self, rows: Iterable[Tuple[str, int]]):
+        """
+        Add or update many space-to-category mappings at once.
+
+        Args:
+            rows: (google_space_id, discourse_category_id) tuples
+        """
+        self._put_many(self._categories, rows)
 
     def get_category_id(self, google_space_id: str) -> Optional[int]:
         """Get the Discourse category ID for a Google Chat space."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT discourse_category_id FROM space_to_category WHERE google_space_id = ?
-        """, (google_space_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get(self._categories, google_space_id)
 
     def get_space_id(self, discourse_category_id: int) -> Optional[str]:
         """Get the Google Chat space ID for a Discourse category."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT google_space_id FROM space_to_category WHERE discourse_category_id = ?
-        """, (discourse_category_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get_reverse(self._categories, discourse_category_id)
 
     # Thread to Topic mappings
-    def add_thread_topic_mapping(self, google_thread_id: str, discourse_topic_id: int, google_space_id: str):
-        """Add or update a thread-to-topic mapping."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO thread_to_topic (google_thread_id, discourse_topic_id, google_space_id)
-            VALUES (?, ?, ?)
-        """, (google_thread_id, discourse_topic_id, google_space_id))
-        self.conn.commit()
-        logger.debug(f"Added mapping: {google_thread_id} -> topic {discourse_topic_id}")
+    def add_thread_topic_mapping(self, google_thread_id: str, discourse_topic_id: int, google_space_id: str) -> int:
+        """Add or update a thread-to-topic mapping and return the stored topic ID."""
+        self._put(self._topics, (google_thread_id, discourse_topic_id, google_space_id))
+        logger.debug("Added mapping: %s -> topic %s", google_thread_id, discourse_topic_id)
+        return discourse_topic_id
+
+    def add_thread_topic_mappings(self, rows: Iterable[Tuple[str, int, str]]):
+        """
+        Add or update many thread-to-topic mappings at once.
+
+        Args:
+            rows: (google_thread_id, discourse_topic_id, google_space_id) tuples
+        """
+        self._put_many(self._topics, rows)
 
     def get_topic_id(self, google_thread_id: str) -> Optional[int]:
         """Get the Discourse topic ID for a Google Chat thread."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT discourse_topic_id FROM thread_to_topic WHERE google_thread_id = ?
-        """, (google_thread_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get(self._topics, google_thread_id)
 
     def get_thread_id(self, discourse_topic_id: int) -> Optional[str]:
         """Get the Google Chat thread ID for a Discourse topic."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT google_thread_id FROM thread_to_topic WHERE discourse_topic_id = ?
-        """, (discourse_topic_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get_reverse(self._topics, discourse_topic_id)
 
     # Message to Post mappings
-    def add_message_post_mapping(self, google_message_id: str, discourse_post_id: int, google_thread_id: str):
-        """Add or update a message-to-post mapping."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO message_to_post (google_message_id, discourse_post_id, google_thread_id)
-            VALUES (?, ?, ?)
-        """, (google_message_id, discourse_post_id, google_thread_id))
-        self.conn.commit()
-        logger.debug(f"Added mapping: {google_message_id} -> post {discourse_post_id}")
+    def add_message_post_mapping(self, google_message_id: str, discourse_post_id: int, google_thread_id: str) -> int:
+        """Add or update a message-to-post mapping and return the stored post ID."""
+        self._put(self._posts, (google_message_id, discourse_post_id, google_thread_id))
+        logger.debug("Added mapping: %s -> post %s", google_message_id, discourse_post_id)
+        return discourse_post_id
+
+    def add_message_post_mappings(self, rows: Iterable[Tuple[str, int, str]]):
+        """
+        Add or update many message-to-post mappings at once.
+
+        Args:
+            rows: (google_message_id, discourse_post_id, google_thread_id) tuples
+        """
+        self._put_many(self._posts, rows)
 
     def get_post_id(self, google_message_id: str) -> Optional[int]:
         """Get the Discourse post ID for a Google Chat message."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT discourse_post_id FROM message_to_post WHERE google_message_id = ?
-        """, (google_message_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get(self._posts, google_message_id)
 
     def get_message_id(self, discourse_post_id: int) -> Optional[str]:
         """Get the Google Chat message ID for a Discourse post."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT google_message_id FROM message_to_post WHERE discourse_post_id = ?
-        """, (discourse_post_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get_reverse(self._posts, discourse_post_id)
+
+    def known_message_ids(self, google_space_id: str) -> Set[str]:
+        """
+        Get every Google Chat message ID in a space that has a mapping.
+
+        Message IDs are "<space>/messages/<id>", so this is a range scan of
+        the primary key rather than a join through thread_to_topic, and it
+        also covers DM messages, which have no thread.
+        """
+        prefix = google_space_id + "/messages/"
+        # "0" is the character after "/", so this bounds exactly the prefix
+        upper = google_space_id + "/messages0"
+        return {row[0] for row in self.conn.execute(_SQL_GET_MESSAGE_IDS_IN_RANGE, (prefix, upper))}
 
     # Sync state management
     def update_last_sync_time(self, space_id: str, timestamp: str):
         """Update the last sync timestamp for a space."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO sync_state (space_id, last_sync_timestamp, updated_at)
-            VALUES (?, ?, CURRENT_TIMESTAMP)
-        """, (space_id, timestamp))
-        self.conn.commit()
+        self._write(_SQL_UPDATE_SYNC_TIME, (space_id, timestamp))
 
     def get_last_sync_time(self, space_id: str) -> Optional[str]:
         """Get the last sync timestamp for a space."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT last_sync_timestamp FROM sync_state WHERE space_id = ?
-        """, (space_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._fetch_value(_SQL_GET_SYNC_TIME, (space_id,))
+
+    def get_last_sync_times(self, space_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        Get the last sync timestamps for many spaces in one query.
+
+        sync_state holds one row per synced space, so the whole table is read
+        with a single fixed statement rather than building an IN (...) list.
+
+        Args:
+            space_ids: Google Chat space IDs to look up
+
+        Returns:
+            Mapping of space ID to timestamp for the spaces that have synced
+        """
+        wanted = set(space_ids)
+        return {
+            space_id: timestamp
+            for space_id, timestamp in self.conn.execute(_SQL_GET_SYNC_TIMES)
+            if space_id in wanted
+        }
 
     # User mappings
     def add_user_mapping(self, gchat_user_id: str, discourse_username: str,
                         gchat_display_name: Optional[str] = None,
                         gchat_email: Optional[str] = None):
         """Add or update a Google Chat user to Discourse user mapping."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO user_mapping 
-            (gchat_user_id, discourse_username, gchat_display_name, gchat_email, updated_at)
-            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (gchat_user_id, discourse_username, gchat_display_name, gchat_email))
-        self.conn.commit()
-        logger.debug(f"Added user mapping: {gchat_user_id} -> {discourse_username}")
+        self._put(self._users, (gchat_user_id, discourse_username, gchat_display_name, gchat_email))
+        logger.debug("Added user mapping: %s -> %s", gchat_user_id, discourse_username)
 
     def get_discourse_username(self, gchat_user_id: str) -> Optional[str]:
         """Get the Discourse username for a Google Chat user."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT discourse_username FROM user_mapping WHERE gchat_user_id = ?
-        """, (gchat_user_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get(self._users, gchat_user_id)
 
     def get_gchat_user_id(self, discourse_username: str) -> Optional[str]:
         """Get the Google Chat user ID for a Discourse username."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT gchat_user_id FROM user_mapping WHERE discourse_username = ?
-        """, (discourse_username,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get_reverse(self._users, discourse_username)
 
     # DM space to chat channel mappings
-    def add_dm_channel_mapping(self, google_space_id: str, discourse_chat_channel_id: int):
-        """Add or update a DM space to chat channel mapping."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO dm_space_to_chat_channel (google_space_id, discourse_chat_channel_id)
-            VALUES (?, ?)
-        """, (google_space_id, discourse_chat_channel_id))
-        self.conn.commit()
-        logger.debug(f"Added DM mapping: {google_space_id} -> chat channel {discourse_chat_channel_id}")
+    def add_dm_channel_mapping(self, google_space_id: str, discourse_chat_channel_id: int) -> int:
+        """Add or update a DM space to chat channel mapping and return the stored channel ID."""
+        self._put(self._dm_channels, (google_space_id, discourse_chat_channel_id))
+        logger.debug("Added DM mapping: %s -> chat channel %s", google_space_id, discourse_chat_channel_id)
+        return discourse_chat_channel_id
+
+    def add_dm_channel_mappings(self, rows: Iterable[Tuple[str, int]]):
+        """
+        Add or update many DM space to chat channel mappings at once.
+
+        Args:
+            rows: (google_space_id, discourse_chat_channel_id) tuples
+        """
+        self._put_many(self._dm_channels, rows)
 
     def get_dm_chat_channel_id(self, google_space_id: str) -> Optional[int]:
         """Get the Discourse chat channel ID for a Google Chat DM space."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT discourse_chat_channel_id FROM dm_space_to_chat_channel WHERE google_space_id = ?
-        """, (google_space_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get(self._dm_channels, google_space_id)
 
     def get_dm_space_id(self, discourse_chat_channel_id: int) -> Optional[str]:
         """Get the Google Chat DM space ID for a Discourse chat channel."""
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT google_space_id FROM dm_space_to_chat_channel WHERE discourse_chat_channel_id = ?
-        """, (discourse_chat_channel_id,))
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return self._get_reverse(self._dm_channels, discourse_chat_channel_id)
 
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
-            logger.info("Database connection closed")
+        """Close the database connections opened by every thread."""
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        if not connections:
+            return
+        for conn in connections:
+            # Let SQLite refresh planner statistics for the indexes if the
+            # tables have changed enough since the last ANALYZE.
+            conn.execute("PRAGMA optimize")
+            conn.close()
+        # Dropping the thread-locals runs their finalizers, which only close
+        # the already-closed connections again.
+        self._local = threading.local()
+        logger.info("Database connection closed")
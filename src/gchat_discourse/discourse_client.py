@@ -2,18 +2,175 @@
 Discourse API client module for interacting with Discourse forum.
 """
 
+import json
 import logging
+import socket
 import requests
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+from dataclasses import dataclass
+from typing import Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from gchat_discourse.cache import TTLCache
+
+# orjson encodes/decodes several times faster than the stdlib json module;
+# use it when installed and fall back to json otherwise.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
-
-@dataclass
+# Default number of pooled connections kept per Discourse host
+_POOL_MAXSIZE = 32
+
+# Characters of a non-JSON error body kept for logging and allow_errors callers
+_ERROR_TEXT_LIMIT = 1024
+
+# Lifetime and size of the get_category/get_topic/get_user caches. These are
+# re-read throughout a sync run; a short TTL bounds staleness from edits made
+# outside this client.
+_RESOURCE_CACHE_TTL = 60
+_RESOURCE_CACHE_SIZE = 2048
+
+T = TypeVar("T")
+
+
+class _LoggingRetry(Retry):
+    """urllib3 Retry that logs each retry attempt at WARNING."""
+
+    def is_retry(self, method, status_code, has_retry_after=False):
+        # POST creates topics/posts and is not idempotent: a 5xx may arrive
+        # after the post was created. A 429 is rejected before any work is
+        # done, so it is the one status where resending a POST is safe.
+        if method.upper() == "POST":
+            return status_code == 429
+        return super().is_retry(method, status_code, has_retry_after)
+
+    def increment(self, method=None, url=None, response=None, error=None, *args, **kwargs):
+        new_retry = super().increment(method, url, response, error, *args, **kwargs)
+        reason = response.status if response is not None else error
+        logger.warning(
+            "Retrying %s %s (%s); %d attempts left, backing off %.1fs",
+            method,
+            url,
+            reason,
+            new_retry.total,
+            new_retry.get_backoff_time(),
+        )
+        return new_retry
+
+
+# Transient failures and rate limits are retried inside the connection pool
+# with exponential backoff (capped at 30s) and Retry-After honored, so a
+# blip does not cost the caller a whole poll interval. POST is left out of
+# allowed_methods so read errors and 5xx never resend a create; 429s are
+# still retried for it by _LoggingRetry.is_retry.
+_RETRY = _LoggingRetry(
+    total=5,
+    backoff_factor=0.5,
+    backoff_max=30,
+    status_forcelist=[429, 500, 502, 503, 504],
+    allowed_methods=["GET", "PUT", "DELETE"],
+    respect_retry_after_header=True,
+    # Hand the last response back so callers still see the status
+    raise_on_status=False,
+)
+
+
+# urllib3's defaults (TCP_NODELAY) plus keepalive probes, so pooled
+# connections that sit idle between polls are kept open through NATs and
+# load balancers, and dead ones are noticed instead of hanging a request.
+# Not every platform exposes the keepalive timing knobs, so only the ones
+# the socket module knows about are set.
+_SOCKET_OPTIONS = HTTPConnection.default_socket_options + [
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+] + [
+    (socket.IPPROTO_TCP, getattr(socket, name), value)
+    for name, value in (("TCP_KEEPIDLE", 60), ("TCP_KEEPINTVL", 15), ("TCP_KEEPCNT", 4))
+    if hasattr(socket, name)
+]
+
+
+class _TunedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections use _SOCKET_OPTIONS."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = _SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _json_dumps(data: Any) -> bytes:
+    """Serialize data to a UTF-8 JSON request body."""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+def _json_loads(content: bytes) -> Any:
+    """Parse a JSON response body."""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+# Whether parsed models keep a reference to their source payload in
+# raw/raw_meta. Off by default so list responses do not pin every item dict.
+KEEP_RAW = False
+
+
+def _compile_from_dict(raw_field: str = "raw"):
+    """
+    Class decorator that generates ``from_dict`` from ``_FIELDS``/``_ALIASES``.
+
+    The generated parser is straight-line code, one ``get`` per field plus an
+    ``or get(alias)`` fallback where Discourse uses an alternate key, in the
+    same way dataclasses generates ``__init__``. That is several times faster
+    than building the kwargs in a loop, which matters for list pages.
+
+    Args:
+        raw_field: Field that receives the source payload when KEEP_RAW is set
+    """
+
+    def decorate(cls):
+        aliases = getattr(cls, "_ALIASES", {})
+        args = []
+        for name in cls._FIELDS:
+            expr = "get(%r)" % name
+            if name in aliases:
+                expr += " or get(%r)" % aliases[name]
+            args.append("%s=%s" % (name, expr))
+        args.append("%s=data if KEEP_RAW else None" % raw_field)
+        source = (
+            "def from_dict(cls, data):\n"
+            "    if data is None:\n"
+            "        return cls(None, None)\n"
+            "    get = data.get\n"
+            "    return cls(%s)\n" % ", ".join(args)
+        )
+        namespace: Dict[str, Any] = {}
+        # Module globals, so KEEP_RAW is read at call time.
+        exec(source, globals(), namespace)
+        from_dict = namespace["from_dict"]
+        from_dict.__qualname__ = "%s.from_dict" % cls.__qualname__
+        cls.from_dict = classmethod(from_dict)
+        return cls
+
+    return decorate
+
+
+# The response models are slotted: list endpoints build one instance per
+# topic/post/user, and slotted instances are faster to create and smaller.
+# The item models name the payload keys they copy in _FIELDS, and the
+# alternate key to fall back to for a field in _ALIASES.
+@_compile_from_dict()
+@dataclass(slots=True)
 class Category:
-    id: Optional[int]
-    name: Optional[str]
+    id: Optional[int] = None
+    name: Optional[str] = None
     color: Optional[str] = None
     text_color: Optional[str] = None
     parent_category_id: Optional[int] = None
@@ -22,32 +179,28 @@ class Category:
     post_count: Optional[int] = None
     description: Optional[str] = None
     read_restricted: Optional[bool] = None
-    raw: Dict[str, Any] = field(default_factory=dict)
-
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "Category":
-        if data is None:
-            return cls(None, None)
-        return cls(
-            id=data.get("id"),
-            name=data.get("name"),
-            color=data.get("color"),
-            text_color=data.get("text_color") or data.get("text-color"),
-            parent_category_id=data.get("parent_category_id")
-            or data.get("parent_category_id"),
-            slug=data.get("slug"),
-            topic_count=data.get("topic_count") or data.get("topic_count"),
-            post_count=data.get("post_count"),
-            description=data.get("description"),
-            read_restricted=data.get("read_restricted"),
-            raw=data,
-        )
-
-
-@dataclass
+    raw: Optional[Dict[str, Any]] = None
+
+    _FIELDS: ClassVar[Tuple[str, ...]] = (
+        "id",
+        "name",
+        "color",
+        "text_color",
+        "parent_category_id",
+        "slug",
+        "topic_count",
+        "post_count",
+        "description",
+        "read_restricted",
+    )
+    _ALIASES: ClassVar[Dict[str, str]] = {"text_color": "text-color"}
+
+
+@_compile_from_dict()
+@dataclass(slots=True)
 class Topic:
-    id: Optional[int]
-    title: Optional[str]
+    id: Optional[int] = None
+    title: Optional[str] = None
     fancy_title: Optional[str] = None
     posts_count: Optional[int] = None
     reply_count: Optional[int] = None
@@ -61,36 +214,38 @@ class Topic:
     slug: Optional[str] = None
     category_id: Optional[int] = None
     excerpt: Optional[str] = None
-    raw: Dict[str, Any] = field(default_factory=dict)
-
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "Topic":
-        if data is None:
-            return cls(None, None)
-        return cls(
-            id=data.get("id") or data.get("topic_id"),
-            title=data.get("title") or data.get("fancy_title"),
-            fancy_title=data.get("fancy_title"),
-            posts_count=data.get("posts_count") or data.get("post_count"),
-            reply_count=data.get("reply_count"),
-            views=data.get("views"),
-            highest_post_number=data.get("highest_post_number"),
-            created_at=data.get("created_at"),
-            last_posted_at=data.get("last_posted_at"),
-            archetype=data.get("archetype"),
-            closed=data.get("closed"),
-            bumped=data.get("bumped"),
-            slug=data.get("slug"),
-            category_id=data.get("category_id") or data.get("category"),
-            excerpt=data.get("excerpt"),
-            raw=data,
-        )
-
-
-@dataclass
+    raw: Optional[Dict[str, Any]] = None
+
+    _FIELDS: ClassVar[Tuple[str, ...]] = (
+        "id",
+        "title",
+        "fancy_title",
+        "posts_count",
+        "reply_count",
+        "views",
+        "highest_post_number",
+        "created_at",
+        "last_posted_at",
+        "archetype",
+        "closed",
+        "bumped",
+        "slug",
+        "category_id",
+        "excerpt",
+    )
+    _ALIASES: ClassVar[Dict[str, str]] = {
+        "id": "topic_id",
+        "title": "fancy_title",
+        "posts_count": "post_count",
+        "category_id": "category",
+    }
+
+
+@_compile_from_dict(raw_field="raw_meta")
+@dataclass(slots=True)
 class Post:
-    id: Optional[int]
-    topic_id: Optional[int]
+    id: Optional[int] = None
+    topic_id: Optional[int] = None
     post_number: Optional[int] = None
     username: Optional[str] = None
     name: Optional[str] = None
@@ -99,31 +254,28 @@ class Post:
     created_at: Optional[str] = None
     updated_at: Optional[str] = None
     reply_to_post_number: Optional[int] = None
-    raw_meta: Dict[str, Any] = field(default_factory=dict)
-
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "Post":
-        if data is None:
-            return cls(None, None)
-        return cls(
-            id=data.get("id"),
-            topic_id=data.get("topic_id") or data.get("topic"),
-            post_number=data.get("post_number"),
-            username=data.get("username"),
-            name=data.get("name"),
-            cooked=data.get("cooked"),
-            raw=data.get("raw"),
-            created_at=data.get("created_at"),
-            updated_at=data.get("updated_at"),
-            reply_to_post_number=data.get("reply_to_post_number"),
-            raw_meta=data,
-        )
-
-
-@dataclass
+    raw_meta: Optional[Dict[str, Any]] = None
+
+    _FIELDS: ClassVar[Tuple[str, ...]] = (
+        "id",
+        "topic_id",
+        "post_number",
+        "username",
+        "name",
+        "cooked",
+        "raw",
+        "created_at",
+        "updated_at",
+        "reply_to_post_number",
+    )
+    _ALIASES: ClassVar[Dict[str, str]] = {"topic_id": "topic"}
+
+
+@_compile_from_dict()
+@dataclass(slots=True)
 class User:
-    id: Optional[int]
-    username: Optional[str]
+    id: Optional[int] = None
+    username: Optional[str] = None
     name: Optional[str] = None
     avatar_template: Optional[str] = None
     admin: Optional[bool] = None
@@ -132,32 +284,27 @@ class User:
     created_at: Optional[str] = None
     last_seen_at: Optional[str] = None
     trust_level: Optional[int] = None
-    raw: Dict[str, Any] = field(default_factory=dict)
-
-    @classmethod
-    def from_dict(cls, data: Dict[str, Any]) -> "User":
-        if data is None:
-            return cls(None, None)
-        return cls(
-            id=data.get("id"),
-            username=data.get("username"),
-            name=data.get("name"),
-            avatar_template=data.get("avatar_template"),
-            admin=data.get("admin"),
-            moderator=data.get("moderator"),
-            title=data.get("title"),
-            created_at=data.get("created_at"),
-            last_seen_at=data.get("last_seen_at"),
-            trust_level=data.get("trust_level"),
-            raw=data,
-        )
-
-
-@dataclass
+    raw: Optional[Dict[str, Any]] = None
+
+    _FIELDS: ClassVar[Tuple[str, ...]] = (
+        "id",
+        "username",
+        "name",
+        "avatar_template",
+        "admin",
+        "moderator",
+        "title",
+        "created_at",
+        "last_seen_at",
+        "trust_level",
+    )
+
+
+@dataclass(slots=True)
 class CategoryShowResponse:
     category: Optional[Category]
     topic_list: Optional[Dict[str, Any]] = None
-    raw: Dict[str, Any] = field(default_factory=dict)
+    raw: Optional[Dict[str, Any]] = None
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "CategoryShowResponse":
@@ -167,14 +314,14 @@ class CategoryShowResponse:
         return cls(
             category=Category.from_dict(cat) if cat else None,
             topic_list=data.get("topic_list"),
-            raw=data,
+            raw=data if KEEP_RAW else None,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class CreateCategoryResponse:
     category: Optional[Category]
-    raw: Dict[str, Any] = field(default_factory=dict)
+    raw: Optional[Dict[str, Any]] = None
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "CreateCategoryResponse":
@@ -183,15 +330,15 @@ class CreateCategoryResponse:
         cat = data.get("category") or data.get("basic_category") or data
         return cls(
             category=Category.from_dict(cat) if isinstance(cat, dict) else None,
-            raw=data,
+            raw=data if KEEP_RAW else None,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class TopicDetailsResponse:
     topic: Optional[Topic]
     post_stream: Optional[Dict[str, Any]] = None
-    raw: Dict[str, Any] = field(default_factory=dict)
+    raw: Optional[Dict[str, Any]] = None
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "TopicDetailsResponse":
@@ -203,47 +350,53 @@ class TopicDetailsResponse:
         topic_obj = None
         if isinstance(t, dict):
             topic_obj = Topic.from_dict(t)
-        return cls(topic=topic_obj, post_stream=post_stream, raw=data)
+        return cls(
+            topic=topic_obj, post_stream=post_stream, raw=data if KEEP_RAW else None
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class CreateTopicResponse:
     post: Optional[Post]
     topic_id: Optional[int] = None
     topic_slug: Optional[str] = None
-    raw: Dict[str, Any] = field(default_factory=dict)
+    raw: Optional[Dict[str, Any]] = None
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "CreateTopicResponse":
         if data is None:
             return cls(None)
-        post = data.get("post") or data
+        get = data.get
+        post = get("post") or data
         return cls(
             post=Post.from_dict(post) if isinstance(post, dict) else None,
-            topic_id=data.get("topic_id") or data.get("id"),
-            topic_slug=data.get("topic_slug") or data.get("slug"),
-            raw=data,
+            topic_id=get("topic_id") or get("id"),
+            topic_slug=get("topic_slug") or get("slug"),
+            raw=data if KEEP_RAW else None,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class PostDetailsResponse:
     post: Optional[Post]
-    raw: Dict[str, Any] = field(default_factory=dict)
+    raw: Optional[Dict[str, Any]] = None
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "PostDetailsResponse":
         if data is None:
             return cls(None)
         p = data.get("post") or data
-        return cls(post=Post.from_dict(p) if isinstance(p, dict) else None, raw=data)
+        return cls(
+            post=Post.from_dict(p) if isinstance(p, dict) else None,
+            raw=data if KEEP_RAW else None,
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class ListTopicsResponse:
     category: Optional[Category]
     topics: List[Topic]
-    raw: Dict[str, Any] = field(default_factory=dict)
+    raw: Optional[Dict[str, Any]] = None
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "ListTopicsResponse":
@@ -252,17 +405,20 @@ class ListTopicsResponse:
         cat = data.get("category")
         topic_list = data.get("topic_list") or {}
         topics_raw = topic_list.get("topics") if isinstance(topic_list, dict) else None
-        topics = [Topic.from_dict(t) for t in topics_raw] if topics_raw else []
+        parse_topic = Topic.from_dict
+        topics = [parse_topic(t) for t in topics_raw] if topics_raw else []
         return cls(
-            category=Category.from_dict(cat) if cat else None, topics=topics, raw=data
+            category=Category.from_dict(cat) if cat else None,
+            topics=topics,
+            raw=data if KEEP_RAW else None,
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class ListPostsResponse:
     topic: Optional[Topic]
     posts: List[Post]
-    raw: Dict[str, Any] = field(default_factory=dict)
+    raw: Optional[Dict[str, Any]] = None
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "ListPostsResponse":
@@ -271,17 +427,18 @@ class ListPostsResponse:
         # Discourse returns posts in `post_stream.posts` for topic endpoints
         post_stream = data.get("post_stream") or {}
         posts_raw = post_stream.get("posts") if isinstance(post_stream, dict) else None
-        posts = [Post.from_dict(p) for p in posts_raw] if posts_raw else []
+        parse_post = Post.from_dict
+        posts = [parse_post(p) for p in posts_raw] if posts_raw else []
         topic = data.get("topic") or data
         topic_obj = Topic.from_dict(topic) if isinstance(topic, dict) else None
-        return cls(topic=topic_obj, posts=posts, raw=data)
+        return cls(topic=topic_obj, posts=posts, raw=data if KEEP_RAW else None)
 
 
-@dataclass
+@dataclass(slots=True)
 class UserResponse:
     user: Optional[User]
     primary_group_name: Optional[str] = None
-    raw: Dict[str, Any] = field(default_factory=dict)
+    raw: Optional[Dict[str, Any]] = None
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "UserResponse":
@@ -291,14 +448,35 @@ class UserResponse:
         return cls(
             user=User.from_dict(u) if isinstance(u, dict) else None,
             primary_group_name=data.get("primary_group_name"),
-            raw=data,
+            raw=data if KEEP_RAW else None,
         )
 
 
 class DiscourseClient:
     """Client for interacting with Discourse API."""
 
-    def __init__(self, url: str, api_key: str, api_username: str):
+    __slots__ = (
+        "url",
+        "api_key",
+        "api_username",
+        "headers",
+        "raise_on_error",
+        "_session",
+        "_category_cache",
+        "_topic_cache",
+        "_user_cache",
+    )
+
+    # Fixed endpoints are shared constants; dynamic ones are %-formatted.
+    _POSTS_URL = "/posts.json"
+    _CATEGORIES_URL = "/categories.json"
+    _USERS_URL = "/users.json"
+    _CHAT_CHANNELS_URL = "/chat/api/channels.json"
+    _DM_CHANNELS_URL = "/chat/api/direct-message-channels.json"
+
+    def __init__(
+        self, url: str, api_key: str, api_username: str, pool_maxsize: int = _POOL_MAXSIZE
+    ):
         """
         Initialize the Discourse API client.
 
@@ -306,6 +484,8 @@ class DiscourseClient:
             url: Base URL of the Discourse instance
             api_key: API key for authentication
             api_username: Username associated with the API key
+            pool_maxsize: Connections kept alive per host; size it to the
+                number of threads that call the client at once
         """
         self.url = url.rstrip("/")
         self.api_key = api_key
@@ -318,7 +498,214 @@ class DiscourseClient:
         # If True, re-raise HTTP errors from _make_request so callers can
         # decide to terminate the process (used by the service's -E flag).
         self.raise_on_error: bool = False
-        logger.info(f"Discourse API client initialized for {self.url}")
+
+        # A shared session keeps TCP/TLS connections to Discourse alive
+        # across calls instead of reconnecting for every request. Connections
+        # beyond pool_maxsize are closed after use rather than kept, so the
+        # pool must cover every thread using the client concurrently.
+        self._session = requests.Session()
+        # Auth and content-type headers ride on the session, so plain
+        # requests pass no per-call headers at all.
+        self._session.headers.update(self.headers)
+        adapter = _TunedHTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=pool_maxsize,
+            max_retries=_RETRY,
+        )
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+        self._category_cache: TTLCache[int, CategoryShowResponse] = TTLCache(
+            _RESOURCE_CACHE_SIZE, _RESOURCE_CACHE_TTL
+        )
+        self._topic_cache: TTLCache[int, TopicDetailsResponse] = TTLCache(
+            _RESOURCE_CACHE_SIZE, _RESOURCE_CACHE_TTL
+        )
+        self._user_cache: TTLCache[str, UserResponse] = TTLCache(
+            _RESOURCE_CACHE_SIZE, _RESOURCE_CACHE_TTL
+        )
+        logger.info("Discourse API client initialized for %s", self.url)
+
+    def close(self):
+        """Close pooled HTTP connections."""
+        self._session.close()
+
+    def clear_cache(self):
+        """Drop cached categories, topics and users so the next reads hit Discourse."""
+        self._category_cache.clear()
+        self._topic_cache.clear()
+        self._user_cache.clear()
+
+    def __enter__(self) -> "DiscourseClient":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def map_concurrently(
+        self,
+        func: Callable[..., T],
+        arg_tuples: Iterable[Tuple[Any, ...]],
+        max_workers: int = 8,
+    ) -> List[T]:
+        """
+        Call ``func(*args)`` for every tuple in arg_tuples concurrently.
+
+        Discourse calls spend almost all of their time waiting on the network,
+        so independent calls are overlapped on a small thread pool sharing this
+        client's connection pool. Results are returned in input order.
+
+        Args:
+            func: Client method (or any callable) to invoke
+            arg_tuples: Positional arguments for each call
+            max_workers: Maximum number of calls in flight at once
+
+        Returns:
+            List of results, one per input tuple
+        """
+        calls = list(arg_tuples)
+        if len(calls) <= 1:
+            return [func(*args) for args in calls]
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(calls))) as executor:
+            return list(executor.map(lambda args: func(*args), calls))
+
+    def _url(self, endpoint: str) -> str:
+        """Join an API endpoint path onto the base URL."""
+        # Endpoints are normally given with a leading slash, so the common
+        # case is a single concatenation onto the (already stripped) base URL.
+        if endpoint[:1] == "/":
+            return self.url + endpoint
+        return self.url + "/" + endpoint
+
+    def _send(
+        self,
+        method: str,
+        url: str,
+        data: Optional[Dict],
+        params: Optional[Dict],
+        impersonate_username: Optional[str],
+        body: Optional[bytes],
+    ) -> requests.Response:
+        """
+        Issue a request and return the response, raising on HTTP errors.
+
+        Raises:
+            requests.exceptions.RequestException: On connection or HTTP errors
+        """
+        # The session carries the default headers; impersonation only sends
+        # the Api-Username override, which requests merges over them.
+        headers = {"Api-Username": impersonate_username} if impersonate_username else None
+
+        # Encode the body ourselves so orjson (when available) is used; the
+        # Content-Type header is already part of the session headers.
+        if body is None and data is not None:
+            body = _json_dumps(data)
+
+        response = self._session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            data=body,
+            params=params,
+            timeout=30,
+        )
+        response.raise_for_status()
+        return response
+
+    def _handle_request_error(
+        self,
+        method: str,
+        endpoint: str,
+        url: str,
+        e: requests.exceptions.RequestException,
+        allow_errors: bool,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Log a failed request and decide what the caller gets back.
+
+        Returns:
+            A structured error dict when allow_errors is set and the server
+            responded, otherwise None
+
+        Raises:
+            requests.exceptions.RequestException: If raise_on_error is set and
+                the server responded
+        """
+        # Provide richer logging for HTTP errors so callers can debug
+        # issues like 4xx/5xx responses. If allow_errors is set, return
+        # a lightweight structured dict so callers can implement retry
+        # or backoff behavior.
+        resp = getattr(e, "response", None)
+        status = getattr(resp, "status_code", None)
+        headers = dict(resp.headers) if resp is not None and getattr(resp, "headers", None) is not None else None
+        body = None
+        if resp is not None:
+            try:
+                body = _json_loads(resp.content)
+            except ValueError:
+                body = {"_text": resp.text[:_ERROR_TEXT_LIMIT]}
+
+        # Log method/endpoint/url/status plus a bounded snippet of the body;
+        # the %.Nr precision keeps multi-KB error pages out of the log.
+        logger.error(
+            "Error making %s request to %s (%s): %s; status=%s; body=%.1024r; headers=%s",
+            method,
+            endpoint,
+            url,
+            e,
+            status,
+            body,
+            headers,
+        )
+
+        if allow_errors and resp is not None:
+            err = {"_status_code": status, "body": body, "headers": headers or {}}
+            if self.raise_on_error:
+                # Turn into an exception so callers with exit-on-error can stop
+                raise requests.exceptions.HTTPError(
+                    f"{status} Error", response=resp
+                )
+            return err
+
+        if self.raise_on_error and resp is not None:
+            # Re-raise the original HTTPError
+            raise e
+
+        return None
+
+    def _make_request_raw(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Dict] = None,
+        params: Optional[Dict] = None,
+        impersonate_username: Optional[str] = None,
+        body: Optional[bytes] = None,
+    ) -> Optional[requests.Response]:
+        """
+        Make an HTTP request to the Discourse API without decoding the body.
+
+        For callers that only need the status or want the raw bytes. Errors
+        are logged and honour raise_on_error exactly as in _make_request.
+
+        Args:
+            method: HTTP method (GET, POST, PUT, DELETE)
+            endpoint: API endpoint path
+            data: Request body data
+            params: URL parameters
+            impersonate_username: Username to impersonate (overrides default Api-Username)
+            body: Pre-encoded JSON request body, used instead of data
+
+        Returns:
+            The successful Response, or None if error
+        """
+        url = self._url(endpoint)
+        try:
+            return self._send(method, url, data, params, impersonate_username, body)
+        except requests.exceptions.RequestException as e:
+            self._handle_request_error(method, endpoint, url, e, allow_errors=False)
+            return None
 
     def _make_request(
         self,
@@ -328,6 +715,7 @@ class DiscourseClient:
         params: Optional[Dict] = None,
         allow_errors: bool = False,
         impersonate_username: Optional[str] = None,
+        body: Optional[bytes] = None,
     ) -> Optional[Dict[str, Any]]:
         """
         Make an HTTP request to the Discourse API.
@@ -338,90 +726,62 @@ class DiscourseClient:
             data: Request body data
             params: URL parameters
             impersonate_username: Username to impersonate (overrides default Api-Username)
+            body: Pre-encoded JSON request body, used instead of data
 
         Returns:
             Response JSON or None if error
         """
-        url = f"{self.url}/{endpoint.lstrip('/')}"
-
-        # Build headers, optionally overriding Api-Username for impersonation
-        headers = self.headers.copy()
-        if impersonate_username:
-            headers["Api-Username"] = impersonate_username
-
+        url = self._url(endpoint)
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                json=data,
-                params=params,
-                timeout=30,
-            )
-            response.raise_for_status()
-
+            response = self._send(method, url, data, params, impersonate_username, body)
         except requests.exceptions.RequestException as e:
-            # Provide richer logging for HTTP errors so callers can debug
-            # issues like 4xx/5xx responses. If allow_errors is set, return
-            # a lightweight structured dict so callers can implement retry
-            # or backoff behavior.
-            resp = getattr(e, "response", None)
-            status = getattr(resp, "status_code", None)
-            headers = dict(resp.headers) if resp is not None and getattr(resp, "headers", None) is not None else None
-            body = None
-            text = None
-            if resp is not None:
-                try:
-                    body = resp.json()
-                except Exception:
-                    try:
-                        text = resp.text
-                    except Exception:
-                        text = None
-                    body = {"_text": text}
-
-            # Log a detailed error message with method/endpoint/url/status/body snippet
-            try:
-                logger.error(
-                    "Error making %s request to %s (%s): %s; status=%s; body=%s; headers=%s",
-                    method,
-                    endpoint,
-                    url,
-                    e,
-                    status,
-                    body,
-                    headers,
-                )
-            except Exception:
-                # Fallback to minimal logging if formatting fails
-                logger.error("Error making %s request to %s: %s", method, endpoint, e)
-
-            if allow_errors and resp is not None:
-                err = {"_status_code": status, "body": body, "headers": headers or {}}
-                if self.raise_on_error:
-                    # Turn into an exception so callers with exit-on-error can stop
-                    raise requests.exceptions.HTTPError(
-                        f"{status} Error", response=resp
-                    )
-                return err
-
-            if self.raise_on_error and resp is not None:
-                # Re-raise the original HTTPError
-                raise
-
-            return None
+            return self._handle_request_error(method, endpoint, url, e, allow_errors)
 
         # Some endpoints return no content
         if response.status_code == 204:
             return {}
 
-        return response.json()
+        return _json_loads(response.content)
 
     # Category operations
+    def list_categories(self) -> Optional[List[Category]]:
+        """
+        List every category, subcategories included.
+
+        One request with include_subcategories=true returns the whole tree,
+        which is flattened depth-first with parents before their children.
+
+        Returns:
+            Flat list of categories or None if error
+        """
+        result = self._make_request(
+            "GET", self._CATEGORIES_URL, params={"include_subcategories": "true"}
+        )
+        if result is None:
+            return None
+        category_list = result.get("category_list") or {}
+        roots = category_list.get("children") or category_list.get("categories") or []
+
+        parse_category = Category.from_dict
+        categories = []
+        stack: List[Dict[str, Any]] = list(reversed(roots))
+        while stack:
+            node = stack.pop()
+            categories.append(parse_category(node))
+            stack.extend(reversed(node.get("children") or node.get("subcategory_list") or ()))
+        return categories
+
     def get_category(self, category_id: int) -> Optional[CategoryShowResponse]:
         """Get category details."""
-        result = self._make_request("GET", f"/c/{category_id}/show.json")
-        return CategoryShowResponse.from_dict(result) if result is not None else None
+        category = self._category_cache.get(category_id)
+        if category is not None:
+            return category
+        result = self._make_request("GET", "/c/%s/show.json" % category_id)
+        if result is None:
+            return None
+        category = CategoryShowResponse.from_dict(result)
+        self._category_cache.set(category_id, category)
+        return category
 
     def create_category(
         self,
@@ -442,34 +802,76 @@ class DiscourseClient:
         Returns:
             Created category details or None if error
         """
-        data: dict[str, str | int] = {
-            "name": name,
-            "color": color,
-            "text_color": text_color,
-        }
+        return self.try_create_category(name, color, text_color, parent_category_id)[0]
+
+    def try_create_category(
+        self,
+        name: str,
+        color: str = "0088CC",
+        text_color: str = "FFFFFF",
+        parent_category_id: Optional[int] = None,
+    ) -> Tuple[Optional[CreateCategoryResponse], Optional[Dict[str, Any]]]:
+        """
+        Create a new category, reporting why a failed attempt failed.
 
+        Callers that handle rate limiting themselves can read the status and
+        Retry-After from the returned error instead of sending a second POST.
+
+        Args:
+            name: Category name
+            color: Category color (hex without #)
+            text_color: Text color (hex without #)
+            parent_category_id: Optional parent category ID for sub-categories
+
+        Returns:
+            (created category details, None) on success, or (None, error)
+            where error is the ``_status_code``/``body``/``headers`` dict from
+            _make_request's allow_errors mode, or None if the server did not
+            respond
+        """
+        # Fixed-shape payload, templated like create_post's body.
+        body = b'{"name":%s,"color":%s,"text_color":%s' % (
+            _json_dumps(name),
+            _json_dumps(color),
+            _json_dumps(text_color),
+        )
         if parent_category_id:
-            data["parent_category_id"] = parent_category_id
+            body += b',"parent_category_id":%s' % _json_dumps(parent_category_id)
+        body += b"}"
 
-        result = self._make_request("POST", "/categories.json", data=data)
+        result = self._make_request(
+            "POST", self._CATEGORIES_URL, body=body, allow_errors=True
+        )
+        if result is None:
+            return None, None
+        if "_status_code" in result:
+            return None, result
         if result:
-            logger.info(f"Created category: {name}")
-        return CreateCategoryResponse.from_dict(result) if result is not None else None
+            logger.info("Created category: %s", name)
+        return CreateCategoryResponse.from_dict(result), None
 
     def update_category(
         self, category_id: int, **kwargs
     ) -> Optional[CreateCategoryResponse]:
         """Update category details."""
         result = self._make_request(
-            "PUT", f"/categories/{category_id}.json", data=kwargs
+            "PUT", "/categories/%s.json" % category_id, data=kwargs
         )
+        self._category_cache.pop(category_id)
         return CreateCategoryResponse.from_dict(result) if result is not None else None
 
     # Topic operations
     def get_topic(self, topic_id: int) -> Optional[TopicDetailsResponse]:
         """Get topic details."""
-        result = self._make_request("GET", f"/t/{topic_id}.json")
-        return TopicDetailsResponse.from_dict(result) if result is not None else None
+        topic = self._topic_cache.get(topic_id)
+        if topic is not None:
+            return topic
+        result = self._make_request("GET", "/t/%s.json" % topic_id)
+        if result is None:
+            return None
+        topic = TopicDetailsResponse.from_dict(result)
+        self._topic_cache.set(topic_id, topic)
+        return topic
 
     def validate_api_key(self) -> bool:
         """Validate that the configured Api-Key/Api-Username are accepted by the server.
@@ -480,7 +882,7 @@ class DiscourseClient:
         """
         # Try to fetch the user resource for the API username
         try:
-            endpoint = f"/u/{self.api_username}.json"
+            endpoint = "/u/%s.json" % self.api_username
             result = self._make_request("GET", endpoint)
             if not result:
                 logger.error(
@@ -504,7 +906,7 @@ class DiscourseClient:
             )
             return False
         except Exception as e:
-            logger.error(f"Exception during Discourse credential validation: {e}")
+            logger.error("Exception during Discourse credential validation: %s", e)
             return False
 
     def create_topic(
@@ -522,26 +924,48 @@ class DiscourseClient:
         Returns:
             Created topic details or None if error
         """
-        data = {"title": title, "raw": raw, "category": category_id}
+        body = b'{"title":%s,"raw":%s,"category":%s}' % (
+            _json_dumps(title),
+            _json_dumps(raw),
+            _json_dumps(category_id),
+        )
 
         result = self._make_request(
-            "POST", "/posts.json", data=data, impersonate_username=impersonate_username
+            "POST", self._POSTS_URL, body=body, impersonate_username=impersonate_username
         )
         if result:
-            logger.info(f"Created topic: {title}")
+            logger.info("Created topic: %s", title)
         return CreateTopicResponse.from_dict(result) if result is not None else None
 
     def update_topic(self, topic_id: int, **kwargs) -> Optional[TopicDetailsResponse]:
         """Update topic details."""
-        result = self._make_request("PUT", f"/t/{topic_id}.json", data=kwargs)
+        result = self._make_request("PUT", "/t/%s.json" % topic_id, data=kwargs)
+        self._topic_cache.pop(topic_id)
         return TopicDetailsResponse.from_dict(result) if result is not None else None
 
     # Post operations
     def get_post(self, post_id: int) -> Optional[PostDetailsResponse]:
         """Get post details."""
-        result = self._make_request("GET", f"/posts/{post_id}.json")
+        result = self._make_request("GET", "/posts/%s.json" % post_id)
         return PostDetailsResponse.from_dict(result) if result is not None else None
 
+    def get_posts(
+        self, post_ids: Iterable[int], max_workers: int = 8
+    ) -> List[Optional[PostDetailsResponse]]:
+        """
+        Fetch many posts concurrently.
+
+        Args:
+            post_ids: Post IDs to fetch
+            max_workers: Maximum number of requests in flight at once
+
+        Returns:
+            One get_post result per ID, in input order
+        """
+        return self.map_concurrently(
+            self.get_post, ((post_id,) for post_id in post_ids), max_workers=max_workers
+        )
+
     def create_post(
         self, topic_id: int, raw: str, impersonate_username: Optional[str] = None
     ) -> Optional[PostDetailsResponse]:
@@ -556,15 +980,48 @@ class DiscourseClient:
         Returns:
             Created post details or None if error
         """
-        data = {"topic_id": topic_id, "raw": raw}
+        # Fixed-shape payload: splice the escaped raw text into a template
+        # instead of building and serializing a dict for every post.
+        body = b'{"topic_id":%s,"raw":%s}' % (
+            _json_dumps(topic_id),
+            _json_dumps(raw),
+        )
 
         result = self._make_request(
-            "POST", "/posts.json", data=data, impersonate_username=impersonate_username
+            "POST", self._POSTS_URL, body=body, impersonate_username=impersonate_username
         )
+        self._topic_cache.pop(topic_id)
         if result:
-            logger.info(f"Created post in topic {topic_id}")
+            logger.info("Created post in topic %s", topic_id)
         return PostDetailsResponse.from_dict(result) if result is not None else None
 
+    def create_posts_bulk(
+        self,
+        items: Iterable[Tuple[int, str]],
+        impersonate_username: Optional[str] = None,
+        max_workers: int = 8,
+    ) -> List[Optional[PostDetailsResponse]]:
+        """
+        Create many posts concurrently.
+
+        Posts are independent round-trips, so they are issued in parallel
+        through map_concurrently rather than one after another. Note that the
+        relative order in which posts land in a topic is not guaranteed.
+
+        Args:
+            items: (topic_id, raw) pairs
+            impersonate_username: Username to post as (uses API impersonation)
+            max_workers: Maximum number of requests in flight at once
+
+        Returns:
+            One create_post result per item, in input order
+        """
+        return self.map_concurrently(
+            self.create_post,
+            ((topic_id, raw, impersonate_username) for topic_id, raw in items),
+            max_workers=max_workers,
+        )
+
     def update_post(self, post_id: int, raw: str) -> Optional[PostDetailsResponse]:
         """
         Update a post.
@@ -576,16 +1033,21 @@ class DiscourseClient:
         Returns:
             Updated post details or None if error
         """
-        data = {"post": {"raw": raw}}
-        result = self._make_request("PUT", f"/posts/{post_id}.json", data=data)
+        body = b'{"post":{"raw":%s}}' % _json_dumps(raw)
+        result = self._make_request("PUT", "/posts/%s.json" % post_id, body=body)
+        if result is None:
+            return None
         if result:
-            logger.info(f"Updated post {post_id}")
-        return PostDetailsResponse.from_dict(result) if result is not None else None
+            logger.info("Updated post %s", post_id)
+        response = PostDetailsResponse.from_dict(result)
+        if response.post is not None and response.post.topic_id is not None:
+            self._topic_cache.pop(response.post.topic_id)
+        return response
 
     def delete_post(self, post_id: int) -> bool:
         """Delete a post."""
-        result = self._make_request("DELETE", f"/posts/{post_id}.json")
-        return result is not None
+        # Only success matters here, so skip decoding the response body.
+        return self._make_request_raw("DELETE", "/posts/%s.json" % post_id) is not None
 
     # List operations
     def list_topics_in_category(
@@ -593,20 +1055,81 @@ class DiscourseClient:
     ) -> Optional[ListTopicsResponse]:
         """List topics in a category."""
         result = self._make_request(
-            "GET", f"/c/{category_id}.json", params={"page": page}
+            "GET", "/c/%s.json" % category_id, params={"page": page}
         )
         return ListTopicsResponse.from_dict(result) if result is not None else None
 
+    def iter_topics_in_category(self, category_id: int) -> Iterator[Topic]:
+        """
+        Yield every topic in a category, fetching pages as they are consumed.
+
+        Topics are parsed one at a time from each page's payload rather than
+        built into a ListTopicsResponse, so only the current page is held.
+        Iteration stops when Discourse stops advertising a next page or a
+        page request fails.
+
+        Args:
+            category_id: Category to list
+
+        Yields:
+            Topic for each listed topic, in Discourse's order
+        """
+        parse_topic = Topic.from_dict
+        page = 0
+        while True:
+            result = self._make_request(
+                "GET", "/c/%s.json" % category_id, params={"page": page}
+            )
+            topic_list = result.get("topic_list") if result else None
+            if not isinstance(topic_list, dict):
+                return
+            topics = topic_list.get("topics") or ()
+            for topic in topics:
+                yield parse_topic(topic)
+            if not topics or not topic_list.get("more_topics_url"):
+                return
+            page += 1
+
     def list_posts_in_topic(self, topic_id: int) -> Optional[ListPostsResponse]:
         """List all posts in a topic."""
-        result = self._make_request("GET", f"/t/{topic_id}.json")
+        result = self._make_request("GET", "/t/%s.json" % topic_id)
         return ListPostsResponse.from_dict(result) if result is not None else None
 
     # User operations
     def get_user(self, username: str) -> Optional[UserResponse]:
         """Get user details."""
-        result = self._make_request("GET", f"/users/{username}.json")
-        return UserResponse.from_dict(result) if result is not None else None
+        user = self._user_cache.get(username)
+        if user is not None:
+            return user
+        result = self._make_request("GET", "/users/%s.json" % username)
+        if result is None:
+            return None
+        user = UserResponse.from_dict(result)
+        self._user_cache.set(username, user)
+        return user
+
+    def get_users_bulk(
+        self, usernames: Iterable[str], max_workers: int = 8
+    ) -> Dict[str, UserResponse]:
+        """
+        Fetch many users concurrently.
+
+        Args:
+            usernames: Discourse usernames to look up (duplicates are fetched once)
+            max_workers: Maximum number of requests in flight at once
+
+        Returns:
+            Dict mapping each username that was found to its UserResponse
+        """
+        unique = list(dict.fromkeys(usernames))
+        results = self.map_concurrently(
+            self.get_user, ((username,) for username in unique), max_workers=max_workers
+        )
+        return {
+            username: result
+            for username, result in zip(unique, results)
+            if result is not None
+        }
 
     def create_user(
         self,
@@ -640,24 +1163,24 @@ class DiscourseClient:
             "approved": approved,
         }
 
-        result = self._make_request("POST", "/users.json", data=data, allow_errors=True)
+        result = self._make_request("POST", self._USERS_URL, data=data, allow_errors=True)
         if result and result.get("_status_code"):
             # Check if user already exists
             status = result.get("_status_code")
             if status == 422:  # Unprocessable Entity - user might exist
-                logger.info(f"User {username} might already exist, attempting to fetch")
+                logger.info("User %s might already exist, attempting to fetch", username)
                 return self.get_user(username)
-            logger.error(f"Failed to create user {username}: {result}")
+            logger.error("Failed to create user %s: %s", username, result)
             return None
         
         if result:
-            logger.info(f"Created user: {username}")
+            logger.info("Created user: %s", username)
         return UserResponse.from_dict(result) if result is not None else None
 
     # Discourse Chat operations
     def list_chat_channels(self) -> Optional[Dict[str, Any]]:
         """List all accessible chat channels."""
-        result = self._make_request("GET", "/chat/api/channels.json")
+        result = self._make_request("GET", self._CHAT_CHANNELS_URL)
         return result
 
     def create_chat_dm_channel(
@@ -674,14 +1197,14 @@ class DiscourseClient:
         """
         data = {"target_usernames": target_usernames}
         result = self._make_request(
-            "POST", "/chat/api/direct-message-channels.json", data=data, allow_errors=True
+            "POST", self._DM_CHANNELS_URL, data=data, allow_errors=True
         )
         
         if result and result.get("_status_code"):
             # DM channel might already exist
             status = result.get("_status_code")
             if status in [422, 409]:  # Unprocessable or Conflict
-                logger.info(f"DM channel with {target_usernames} might already exist")
+                logger.info("DM channel with %s might already exist", target_usernames)
                 # Try to find existing channel
                 channels = self.list_chat_channels()
                 if channels and "direct_message_channels" in channels:
@@ -692,11 +1215,11 @@ class DiscourseClient:
                         )
                         if set(target_usernames).issubset(channel_usernames):
                             return {"channel": channel}
-            logger.error(f"Failed to create DM channel: {result}")
+            logger.error("Failed to create DM channel: %s", result)
             return None
 
         if result:
-            logger.info(f"Created DM channel with {target_usernames}")
+            logger.info("Created DM channel with %s", target_usernames)
         return result
 
     def send_chat_message(
@@ -713,15 +1236,15 @@ class DiscourseClient:
         Returns:
             Created message details or None if error
         """
-        data = {"message": message}
+        body = b'{"message":%s}' % _json_dumps(message)
         result = self._make_request(
             "POST",
-            f"/chat/api/channels/{channel_id}/messages.json",
-            data=data,
+            "/chat/api/channels/%s/messages.json" % channel_id,
+            body=body,
             impersonate_username=impersonate_username,
         )
         if result:
-            logger.info(f"Sent chat message to channel {channel_id}")
+            logger.info("Sent chat message to channel %s", channel_id)
         return result
 
     def list_chat_messages(
@@ -739,7 +1262,7 @@ class DiscourseClient:
         """
         result = self._make_request(
             "GET",
-            f"/chat/api/channels/{channel_id}/messages.json",
+            "/chat/api/channels/%s/messages.json" % channel_id,
             params={"page_size": page_size},
         )
         return result
@@ -3,13 +3,32 @@ Google Chat API client module for interacting with Google Chat API.
 """
 
 import logging
+import os
 import os.path
-from typing import TYPE_CHECKING, Dict, List, Any, Optional
+import re
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Iterator, List, Any, Optional
+from google.auth.exceptions import TransportError
 from google.auth.transport.requests import Request
+from google.oauth2 import service_account
 from google.oauth2.credentials import Credentials
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
 from googleapiclient.errors import HttpError
+from googleapiclient.model import JsonModel
+import httplib2
+
+# orjson decodes Chat API responses several times faster than the stdlib
+# json module that googleapiclient uses; it is optional.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from gchat_discourse.cache import TTLCache
 
 if TYPE_CHECKING:
     from googleapiclient._apis.chat.v1 import ( # pyright: ignore[reportMissingModuleSource]
@@ -28,38 +47,150 @@ SCOPES = [
     "https://www.googleapis.com/auth/chat.messages",
 ]
 
+# Values for the google.auth_mode setting
+AUTH_MODE_OAUTH = "oauth"
+AUTH_MODE_SERVICE_ACCOUNT = "service_account"
+
+# Socket timeout for Google Chat API requests, in seconds
+_HTTP_TIMEOUT = 30
+
+# Lifetime and size of the get_space/get_message caches. Space metadata and
+# message bodies rarely change within a sync run; a short TTL bounds staleness.
+_RESOURCE_CACHE_TTL = 300
+_RESOURCE_CACHE_SIZE = 1024
+
+# Waits between attempts to refresh a stored OAuth token when the token
+# endpoint cannot be reached; only after these does startup fall back to the
+# interactive browser flow.
+_REFRESH_RETRY_DELAYS = (0.5, 1.0, 2.0)
+
+# Maximum number of sub-requests Google accepts in one batch request
+_BATCH_LIMIT = 100
+
+# 'type'/'spaceType' values that mark a direct message space
+_DM_TYPES = frozenset(("DIRECT_MESSAGE", "DM"))
+
+# Trailing "Z" or "+hh:mm"/"-hh:mm" that pins a timestamp's zone
+_TZ_SUFFIX = re.compile(r"(?:Z|[+-]\d\d:\d\d)$")
+
+class _OrjsonModel(JsonModel):
+    """googleapiclient JsonModel that (de)serializes bodies with orjson."""
+
+    def serialize(self, body_value):
+        if isinstance(body_value, dict) and "data" not in body_value and self._data_wrapper:
+            body_value = {"data": body_value}
+        # Request bodies are small; return str as batch and media requests expect
+        return orjson.dumps(body_value).decode("utf-8")
+
+    def deserialize(self, content):
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            # Match JsonModel: hand back non-JSON bodies unparsed
+            return content.decode("utf-8") if isinstance(content, bytes) else content
+        if self._data_wrapper and "data" in body:
+            body = body["data"]
+        return body
+
+
+def created_after_filter(timestamp: str) -> str:
+    """
+    Build a list_messages filter matching messages created after timestamp.
+
+    Args:
+        timestamp: RFC 3339 / ISO 8601 time; naive values are taken as UTC
+
+    Returns:
+        Filter string such as 'createTime > "2024-01-01T00:00:00Z"'
+    """
+    if not _TZ_SUFFIX.search(timestamp):
+        timestamp += "Z"
+    return f'createTime > "{timestamp}"'
+
 
 class GoogleChatClient:
     """Client for interacting with Google Chat API."""
 
     service: "HangoutsChatResource"
 
-    def __init__(self, credentials_file: str, token_file: str):
+    def __init__(
+        self,
+        credentials_file: str,
+        token_file: str,
+        discovery_file: Optional[str] = None,
+        auth_mode: str = AUTH_MODE_OAUTH,
+        impersonate_user: Optional[str] = None,
+    ):
         """
         Initialize the Google Chat API client.
 
         Args:
-            credentials_file: Path to the OAuth 2.0 credentials JSON file
-            token_file: Path to store/load the OAuth token
+            credentials_file: Path to the OAuth 2.0 client ID file, or the
+                service account key file when auth_mode is 'service_account'
+            token_file: Path to store/load the OAuth token (unused for service accounts)
+            discovery_file: Optional path to a pinned Chat v1 discovery document
+            auth_mode: 'oauth' for the interactive user flow, or
+                'service_account' for headless deployments
+            impersonate_user: Email of the user a service account acts as
+                through domain-wide delegation
         """
+        if auth_mode not in (AUTH_MODE_OAUTH, AUTH_MODE_SERVICE_ACCOUNT):
+            raise ValueError(f"Unknown Google auth mode: {auth_mode}")
         self.credentials_file = credentials_file
         self.token_file = token_file
+        self.discovery_file = discovery_file
+        self.auth_mode = auth_mode
+        self.impersonate_user = impersonate_user
         self.creds = None
+        # Serializes token refreshes so parallel sync threads do not all
+        # refresh (and rewrite the token file) at once.
+        self._refresh_lock = threading.Lock()
+        # Refresh transport shared by every refresh, so its requests.Session
+        # keeps one pooled connection to the token endpoint.
+        self._auth_request = Request()
+        # httplib2.Http is not thread-safe, so each thread that executes
+        # requests gets its own authorized transport.
+        self._local = threading.local()
+        self._space_cache: TTLCache[str, "Space"] = TTLCache(_RESOURCE_CACHE_SIZE, _RESOURCE_CACHE_TTL)
+        self._message_cache: TTLCache[str, "Message"] = TTLCache(_RESOURCE_CACHE_SIZE, _RESOURCE_CACHE_TTL)
         self._authenticate()
 
     def _authenticate(self):
-        """Authenticate with Google Chat API using OAuth 2.0."""
+        """Authenticate with Google Chat API using OAuth 2.0 or a service account."""
+        if self.auth_mode == AUTH_MODE_SERVICE_ACCOUNT:
+            self._authenticate_service_account()
+        else:
+            self._authenticate_oauth()
+
+        self.service = self._build_service()
+        logger.info("Google Chat API client initialized")
+
+    def _authenticate_service_account(self):
+        """
+        Load service account credentials.
+
+        No browser flow or token file is involved; the first request mints an
+        access token from the key through _ensure_fresh.
+        """
+        creds = service_account.Credentials.from_service_account_file(
+            self.credentials_file, scopes=SCOPES
+        )
+        if self.impersonate_user:
+            creds = creds.with_subject(self.impersonate_user)
+        self.creds = creds
+        logger.info("Loaded Google service account credentials")
+
+    def _authenticate_oauth(self):
+        """Load the stored OAuth token, refreshing or running the browser flow as needed."""
         if os.path.exists(self.token_file):
             self.creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
 
         # If there are no (valid) credentials available, let the user log in
         if not self.creds or not self.creds.valid:
             if self.creds and self.creds.expired and self.creds.refresh_token:
-                try:
-                    self.creds.refresh(Request())
+                if self._refresh_stored_token():
                     logger.info("Refreshed Google Chat API credentials")
-                except Exception as e:
-                    logger.error(f"Failed to refresh credentials: {e}")
+                else:
                     self.creds = None
 
             if not self.creds:
@@ -70,11 +201,125 @@ class GoogleChatClient:
                 logger.info("Obtained new Google Chat API credentials")
 
             # Save the credentials for the next run
-            with open(self.token_file, "w") as token:
-                token.write(self.creds.to_json())
+            with self._refresh_lock:
+                self._save_token()
 
-        self.service = build("chat", "v1", credentials=self.creds)
-        logger.info("Google Chat API client initialized")
+    def _refresh_stored_token(self) -> bool:
+        """
+        Refresh the stored OAuth token, retrying while Google is unreachable.
+
+        Network errors are retried with backoff so a blip at startup does not
+        cost an interactive re-authorization; any other failure (such as a
+        revoked refresh token) gives up at once.
+
+        Returns:
+            True if the token was refreshed
+        """
+        for delay in (*_REFRESH_RETRY_DELAYS, None):
+            try:
+                self.creds.refresh(self._auth_request)
+                return True
+            except TransportError as e:
+                if delay is None:
+                    logger.error("Failed to refresh credentials: %s", e)
+                    return False
+                logger.warning(
+                    "Could not reach Google to refresh credentials, retrying in %.1fs: %s",
+                    delay,
+                    e,
+                )
+                time.sleep(delay)
+            except Exception as e:
+                logger.error("Failed to refresh credentials: %s", e)
+                return False
+        return False
+
+    def _build_service(self) -> "HangoutsChatResource":
+        """
+        Build the Chat API resource without fetching the discovery document.
+
+        A pinned discovery_file is used when configured; otherwise the
+        document bundled with google-api-python-client is. Either way startup
+        never waits on the Discovery Service.
+        """
+        http = self._new_http()
+        model = _OrjsonModel() if orjson is not None else None
+        if self.discovery_file and os.path.exists(self.discovery_file):
+            with open(self.discovery_file, "r") as f:
+                document = f.read()
+            logger.debug("Using discovery document from %s", self.discovery_file)
+            return build_from_document(document, http=http, model=model)
+
+        if self.discovery_file:
+            logger.warning(
+                "Discovery document %s not found; using the bundled copy", self.discovery_file
+            )
+        return build(
+            "chat",
+            "v1",
+            http=http,
+            model=model,
+            static_discovery=True,
+            cache_discovery=False,
+        )
+
+    def _save_token(self):
+        """
+        Persist the current credentials, replacing the token file atomically.
+
+        The token is written and fsynced to a temporary file next to
+        token_file and then renamed over it, so a crash mid-write leaves the
+        previous token intact instead of a truncated file that would force
+        an interactive re-authorization.
+        """
+        directory = os.path.dirname(os.path.abspath(self.token_file))
+        fd, tmp_path = tempfile.mkstemp(
+            dir=directory, prefix=os.path.basename(self.token_file) + ".", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as token:
+                token.write(self.creds.to_json())
+                token.flush()
+                os.fsync(token.fileno())
+            os.replace(tmp_path, self.token_file)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _needs_refresh(self) -> bool:
+        """True if the access token is missing or about to expire.
+
+        This is the same check AuthorizedHttp makes before every request
+        (google-auth counts a token as invalid a few minutes before its
+        expiry). Refreshing here first, under the lock, keeps each thread's
+        transport from refreshing on its own.
+        """
+        return not self.creds.valid
+
+    def _ensure_fresh(self):
+        """Refresh the access token if it is about to expire."""
+        if not self._needs_refresh():
+            return
+        with self._refresh_lock:
+            # Another thread may have refreshed while we waited for the lock
+            if not self._needs_refresh():
+                return
+            self.creds.refresh(self._auth_request)
+            logger.info("Refreshed Google Chat API credentials")
+            if self.auth_mode == AUTH_MODE_OAUTH:
+                self._save_token()
+
+    def _new_http(self) -> AuthorizedHttp:
+        """Create an authorized keep-alive HTTP transport."""
+        return AuthorizedHttp(self.creds, http=httplib2.Http(timeout=_HTTP_TIMEOUT))
+
+    def _execute(self, request):
+        """Execute an API request on the calling thread's HTTP transport."""
+        self._ensure_fresh()
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = self._local.http = self._new_http()
+        return request.execute(http=http)
 
     def get_space(self, space_id: str) -> Optional["Space"]:
         """
@@ -86,43 +331,119 @@ class GoogleChatClient:
         Returns:
             Space details or None if error
         """
+        space = self._space_cache.get(space_id)
+        if space is not None:
+            return space
         try:
-            space = self.service.spaces().get(name=space_id).execute()
-            logger.debug(f"Retrieved space: {space_id}")
+            space = self._execute(self.service.spaces().get(name=space_id))
+            logger.debug("Retrieved space: %s", space_id)
+            self._space_cache.set(space_id, space)
             return space
         except HttpError as error:
-            logger.error(f"Error getting space {space_id}: {error}")
+            logger.error("Error getting space %s: %s", space_id, error)
             return None
 
+    def get_spaces_batch(self, space_ids: List[str]) -> Dict[str, Optional["Space"]]:
+        """
+        Get many spaces, batching the ones that are not already cached.
+
+        Up to _BATCH_LIMIT gets are multiplexed into each HTTP round-trip, and
+        fetched spaces are cached so later get_space calls are served locally.
+
+        Args:
+            space_ids: Space IDs (e.g., 'spaces/AAAAAAAAAAA')
+
+        Returns:
+            Mapping of space ID to space details, or None for spaces that
+            could not be fetched
+        """
+        results: Dict[str, Optional["Space"]] = {}
+        missing = []
+        for space_id in dict.fromkeys(space_ids):
+            space = self._space_cache.get(space_id)
+            if space is None:
+                missing.append(space_id)
+            else:
+                results[space_id] = space
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                logger.error("Error getting space %s: %s", request_id, exception)
+                results[request_id] = None
+            else:
+                results[request_id] = response
+                self._space_cache.set(request_id, response)
+
+        spaces = self.service.spaces()
+        for start in range(0, len(missing), _BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for space_id in missing[start:start + _BATCH_LIMIT]:
+                batch.add(spaces.get(name=space_id), request_id=space_id)
+            try:
+                self._execute(batch)
+            except HttpError as error:
+                logger.error("Error executing space batch: %s", error)
+                for space_id in missing[start:start + _BATCH_LIMIT]:
+                    results.setdefault(space_id, None)
+
+        logger.debug("Retrieved %d spaces (%d fetched)", len(results), len(missing))
+        return results
+
     def list_messages(
-        self, space_id: str, page_size: int = 100, page_token: Optional[str] = None
+        self,
+        space_id: str,
+        page_size: int = 100,
+        page_token: Optional[str] = None,
+        filter: Optional[str] = None,
+        order_by: Optional[str] = None,
     ) -> "ListMessagesResponse":
         """
-        List messages in a space.
+        List messages in a space, oldest first unless order_by says otherwise.
 
         Args:
             space_id: The space ID
             page_size: Number of messages to retrieve per page
             page_token: Token for pagination
+            filter: Optional Chat API filter, e.g. from created_after_filter()
+            order_by: Optional ordering, e.g. 'createTime desc'
 
         Returns:
             Dictionary with 'messages' list and optional 'nextPageToken'
         """
         try:
-            request = (
-                self.service.spaces()
-                .messages()
-                .list(parent=space_id, pageSize=page_size, pageToken=page_token or "")
-            )
-            response = request.execute()
-            logger.debug(
-                f"Listed {len(response.get('messages', []))} messages from {space_id}"
-            )
+            params = {"parent": space_id, "pageSize": page_size, "pageToken": page_token or ""}
+            if filter:
+                # The page token already encodes the filter, but the API
+                # requires it to be repeated on every page.
+                params["filter"] = filter
+            if order_by:
+                params["orderBy"] = order_by
+            request = self.service.spaces().messages().list(**params)
+            response = self._execute(request)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Listed %d messages from %s", len(response.get("messages", ())), space_id
+                )
             return response
         except HttpError as error:
-            logger.error(f"Error listing messages in {space_id}: {error}")
+            logger.error("Error listing messages in %s: %s", space_id, error)
             return {"messages": []}
 
+    def get_latest_message(self, space_id: str) -> Optional["Message"]:
+        """
+        Get the newest message in a space with a single-item request.
+
+        Args:
+            space_id: The space ID
+
+        Returns:
+            Message details (including name and createTime), or None if the
+            space is empty or the request failed
+        """
+        response = self.list_messages(space_id, page_size=1, order_by="createTime desc")
+        messages = response.get("messages")
+        return messages[0] if messages else None
+
     def get_message(self, message_name: str) -> Optional["Message"]:
         """
         Get a specific message.
@@ -133,14 +454,58 @@ class GoogleChatClient:
         Returns:
             Message details or None if error
         """
+        message = self._message_cache.get(message_name)
+        if message is not None:
+            return message
         try:
-            message = self.service.spaces().messages().get(name=message_name).execute()
-            logger.debug(f"Retrieved message: {message_name}")
+            message = self._execute(self.service.spaces().messages().get(name=message_name))
+            logger.debug("Retrieved message: %s", message_name)
+            self._message_cache.set(message_name, message)
             return message
         except HttpError as error:
-            logger.error(f"Error getting message {message_name}: {error}")
+            logger.error("Error getting message %s: %s", message_name, error)
             return None
 
+    def get_messages_batch(
+        self, message_names: List[str]
+    ) -> Dict[str, Optional["Message"]]:
+        """
+        Get many messages using batched HTTP requests.
+
+        Up to _BATCH_LIMIT gets are multiplexed into each HTTP round-trip.
+
+        Args:
+            message_names: Full message names (e.g., 'spaces/AAAAA/messages/BBBBB')
+
+        Returns:
+            Mapping of message name to message details, or None for messages
+            that could not be fetched
+        """
+        results: Dict[str, Optional["Message"]] = {}
+
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                logger.error("Error getting message %s: %s", request_id, exception)
+                results[request_id] = None
+            else:
+                results[request_id] = response
+
+        names = list(dict.fromkeys(message_names))
+        messages = self.service.spaces().messages()
+        for start in range(0, len(names), _BATCH_LIMIT):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for name in names[start:start + _BATCH_LIMIT]:
+                batch.add(messages.get(name=name), request_id=name)
+            try:
+                self._execute(batch)
+            except HttpError as error:
+                logger.error("Error executing message batch: %s", error)
+                for name in names[start:start + _BATCH_LIMIT]:
+                    results.setdefault(name, None)
+
+        logger.debug("Retrieved %d messages in batches", len(results))
+        return results
+
     def create_message(
         self, space_id: str, text: str, thread_id: Optional[str] = None
     ) -> Optional["Message"]:
@@ -161,16 +526,15 @@ class GoogleChatClient:
             if thread_id:
                 message_body["thread"] = {"name": thread_id}
 
-            message = (
+            message = self._execute(
                 self.service.spaces()
                 .messages()
                 .create(parent=space_id, body=message_body)
-                .execute()
             )
-            logger.info(f"Created message in {space_id}")
+            logger.info("Created message in %s", space_id)
             return message
         except HttpError as error:
-            logger.error(f"Error creating message in {space_id}: {error}")
+            logger.error("Error creating message in %s: %s", space_id, error)
             return None
 
     def update_message(self, message_name: str, text: str) -> Optional["Message"]:
@@ -185,18 +549,54 @@ class GoogleChatClient:
             Updated message details or None if error
         """
         try:
-            message = (
+            message = self._execute(
                 self.service.spaces()
                 .messages()
                 .update(name=message_name, updateMask="text", body={"text": text})
-                .execute()
             )
-            logger.info(f"Updated message: {message_name}")
+            logger.info("Updated message: %s", message_name)
+            self._message_cache.pop(message_name)
             return message
         except HttpError as error:
-            logger.error(f"Error updating message {message_name}: {error}")
+            logger.error("Error updating message %s: %s", message_name, error)
             return None
 
+    def _list_spaces_pages(self, page_size: int = 100) -> Iterator[List["Space"]]:
+        """
+        Yield each page of spaces the authenticated user is a member of.
+
+        Raises:
+            HttpError: If a page request fails
+        """
+        page_token = None
+        while True:
+            request = self.service.spaces().list(
+                pageSize=page_size, pageToken=page_token or ""
+            )
+            response = self._execute(request)
+            yield response.get("spaces", [])
+
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+
+    def iter_spaces(self, page_size: int = 100) -> Iterator["Space"]:
+        """
+        Iterate over all spaces the authenticated user is a member of.
+
+        Pages are fetched lazily, so callers can start on the first spaces
+        before later pages arrive. Iteration stops early (after logging) if a
+        page request fails.
+
+        Args:
+            page_size: Number of spaces to retrieve per page
+        """
+        try:
+            for page in self._list_spaces_pages(page_size):
+                yield from page
+        except HttpError as error:
+            logger.error("Error listing spaces: %s", error)
+
     def list_spaces(self, page_size: int = 100) -> List[Dict[str, Any]]:
         """
         List all spaces the authenticated user is a member of.
@@ -208,25 +608,15 @@ class GoogleChatClient:
             List of space details
         """
         try:
-            spaces = []
-            page_token = None
-
-            while True:
-                request = self.service.spaces().list(
-                    pageSize=page_size, pageToken=page_token or ""
-                )
-                response = request.execute()
-
-                spaces.extend(response.get("spaces", []))
-                page_token = response.get("nextPageToken")
-
-                if not page_token:
-                    break
-
-            logger.info(f"Listed {len(spaces)} spaces")
+            spaces = [
+                space
+                for page in self._list_spaces_pages(page_size)
+                for space in page
+            ]
+            logger.info("Listed %d spaces", len(spaces))
             return spaces
         except HttpError as error:
-            logger.error(f"Error listing spaces: {error}")
+            logger.error("Error listing spaces: %s", error)
             return []
 
     def is_dm_space(self, space: Dict[str, Any]) -> bool:
@@ -239,11 +629,10 @@ class GoogleChatClient:
         Returns:
             True if space is a DM, False otherwise
         """
-        # Google Chat spaces have a 'type' field that can be:
-        # - 'DM': Direct message between two users
-        # - 'ROOM': Group chat or space
-        space_type = space.get("type", "")
-        return space_type == "DM"
+        # Google Chat spaces report their kind in two fields:
+        # - 'spaceType': 'DIRECT_MESSAGE', 'GROUP_CHAT' or 'SPACE'
+        # - 'type' (deprecated): 'DM' or 'ROOM'
+        return space.get("type") in _DM_TYPES or space.get("spaceType") in _DM_TYPES
 
     def get_space_type(self, space: Dict[str, Any]) -> str:
         """
@@ -11,28 +11,53 @@ Usage:
 
 from __future__ import annotations
 
+import functools
+import itertools
 import logging
-from typing import List, Dict, Any, Optional
+import sys
+import time
+from typing import Container, List, Dict, Optional
 
-from gchat_discourse.config_loader import Config
+from gchat_discourse.config_loader import Config, YamlDumper, YamlLoader
+from gchat_discourse import discourse_client
 from gchat_discourse.discourse_client import DiscourseClient, Category
 from gchat_discourse.google_chat_client import GoogleChatClient
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
+# Attempts per category and the base of the exponential backoff between them
+_MAX_ATTEMPTS = 5
+_BASE_BACKOFF = 1.0  # seconds
 
+# Category creations in flight at once
+_CREATE_WORKERS = 4
+
+
+@functools.lru_cache(maxsize=4096)
 def _normalize(name: Optional[str]) -> str:
-    return (name or "").strip().lower()
+    # Space and category names repeat across lookups; cache and intern the
+    # normalized form so repeats skip the strip/lower and share one string.
+    return sys.intern((name or "").strip().lower())
 
 
 def _make_unique_truncated_name(
-    desired: str, existing_norms: set, max_len: int = 50
+    desired: str,
+    existing_norms: Container[str],
+    max_len: int = 50,
+    next_suffix: Optional[Dict[str, int]] = None,
 ) -> str:
     """Return a name <= max_len that's unique against existing_norms (normalized names).
 
+    existing_norms is only tested with ``in``, so a set or a dict's keys view
+    can be passed as-is without copying.
+
     If the desired name is too long, truncate. If truncation causes a collision,
     append a short numeric suffix like " (2)" while keeping within max_len.
+
+    Pass the same next_suffix dict across calls to remember the next free
+    suffix per truncated base, so many names sharing a long prefix do not
+    re-probe every suffix already handed out.
     """
     base = desired.strip()
     if not base:
@@ -45,9 +70,13 @@ def _make_unique_truncated_name(
     # Start with a truncated base
     truncated = base[:max_len].rstrip()
     cand = truncated
+    key = _normalize(truncated)
 
     i = 2
-    while _normalize(cand) in existing_norms:
+    if next_suffix is not None and key in next_suffix:
+        i = next_suffix[key]
+        cand = ""
+    while not cand or _normalize(cand) in existing_norms:
         suffix = f" ({i})"
         avail = max_len - len(suffix)
         if avail <= 0:
@@ -58,14 +87,68 @@ def _make_unique_truncated_name(
             cand = (base[:avail]).rstrip() + suffix
         i += 1
 
+    if next_suffix is not None:
+        next_suffix[key] = i
     return cand
 
 
+def _create_category_with_retry(
+    dc: DiscourseClient, display: str, safe_name: str
+) -> Optional[Category]:
+    """Create one category, waiting out 429s; returns the category or None."""
+    print(f"Creating Discourse category for space '{safe_name}'...")
+
+    attempt = 0
+    while attempt < _MAX_ATTEMPTS:
+        attempt += 1
+        # try_create_category hands back the error details of a failed
+        # POST, so a rate limit can be detected without sending it again.
+        resp, err_info = dc.try_create_category(name=safe_name)
+
+        # If CreateCategoryResponse object, success path
+        if resp and getattr(resp, "category", None):
+            cat = resp.category
+            assert cat is not None
+            print(f"Created category: id={cat.id} name={cat.name}")
+            return cat
+
+        # On a 429, wait for the Retry-After the server asked for.
+        if err_info is not None and err_info.get("_status_code") == 429:
+            headers = err_info.get("headers", {}) or {}
+            ra = headers.get("Retry-After") or headers.get("retry-after")
+            wait = None
+            if ra:
+                try:
+                    wait = float(ra)
+                except Exception:
+                    # if Retry-After is a HTTP-date, fallback to exponential
+                    wait = None
+
+            if wait is None:
+                # exponential backoff with jitter
+                wait = _BASE_BACKOFF * (2 ** (attempt - 1))
+                # add a small jitter
+                wait = wait + (0.1 * (attempt % 3))
+
+            print(f"Received 429 Rate Limited from Discourse. Waiting {wait:.1f}s before retry (attempt {attempt}/{_MAX_ATTEMPTS})")
+            time.sleep(wait)
+            continue
+
+        # If we didn't get rate-limited, consider this a failure and stop retrying
+        print(f"Failed to create category for '{display}' (attempt {attempt})")
+        # small backoff before next attempt to avoid hammering
+        time.sleep(_BASE_BACKOFF * attempt)
+
+    print(f"Giving up creating category for '{display}' after {_MAX_ATTEMPTS} attempts")
+    return None
+
+
 def main(config_path: str = "config.yaml", debug_responses: bool = False) -> None:
     if debug_responses:
         # Enable DEBUG logging so helpers like _format_response will emit full payloads
         logging.getLogger().setLevel(logging.DEBUG)
         logger.setLevel(logging.DEBUG)
+        discourse_client.KEEP_RAW = True
     cfg = Config(config_path)
 
     dc = DiscourseClient(
@@ -82,48 +165,40 @@ def main(config_path: str = "config.yaml", debug_responses: bool = False) -> Non
     gc = GoogleChatClient(
         credentials_file=cfg.google_credentials_file,
         token_file=cfg.google_token_file,
+        discovery_file=cfg.google_discovery_file,
+        auth_mode=cfg.google_auth_mode,
+        impersonate_user=cfg.google_impersonate_user,
     )
 
     print("Fetching Discourse categories...")
-    raw = dc._make_request("GET", "/categories.json") or {}
-    category_tree = raw.get("category_list", {}).get("categories", [])
-    children = raw.get("category_list", {}).get("children")
-
-    categories: List[Category]
-    if children:
-        # flatten tree similar to existing helper in manage_mappings
-        def walk(node: Dict[str, Any], depth: int = 0, out: List[Category] = []):
-            out.append(Category.from_dict(node))
-            for c in node.get("children", []):
-                walk(c, depth + 1, out)
-
-        out: List[Category] = []
-        for root in children:
-            walk(root, 0, out)
-        categories = out
-    else:
-        categories = [Category.from_dict(c) for c in category_tree]
+    categories = dc.list_categories() or []
 
     existing_names = { _normalize(c.name): c for c in categories }
 
     print("Fetching Google Chat spaces (may prompt for auth)...")
-    spaces = gc.list_spaces()
-    if not spaces:
+    # Spaces are paged in lazily; the first one is pulled up front only to
+    # tell an empty (or failed) listing apart.
+    spaces = gc.iter_spaces()
+    first_space = next(spaces, None)
+    if first_space is None:
         print("No spaces returned or failed to list spaces.")
         return
 
     created = []
     skipped = []
-    # Prepare mappings (preserve existing unless we change/add)
-    new_mappings = cfg.space_mappings.copy() if cfg.space_mappings else []
-    idx_by_space = {m.get("google_space_id"): i for i, m in enumerate(new_mappings)}
-
-    import time
-
-    MAX_ATTEMPTS = 5
-    BASE_BACKOFF = 1.0  # seconds
-
-    for s in spaces:
+    # Mappings are updated in place through the loader's index; entries in
+    # space_mapping_by_id are the same dicts as in space_mappings. Both belong
+    # to this Config's own copy of the document, never the loader's cache.
+    mapping_by_id = cfg.space_mapping_by_id
+    mappings_changed = False
+
+    # Plan every creation up front so names are reserved in input order;
+    # two spaces can then never race for the same truncated name.
+    taken = set(existing_names)
+    suffixes: Dict[str, int] = {}
+    planned: Dict[str, str] = {}
+    to_create: List[tuple] = []
+    for s in itertools.chain((first_space,), spaces):
         sid = s.get("name") or s.get("spaceId") or s.get("space_id")
         if sid is None:
             continue
@@ -141,84 +216,59 @@ def main(config_path: str = "config.yaml", debug_responses: bool = False) -> Non
             skipped.append((sid, display, existing_names[norm].id))
             print(f"Skipping '{display}' — category already exists (id={existing_names[norm].id})")
             continue
+        if norm in planned:
+            skipped.append((sid, display, None))
+            print(f"Skipping '{display}' — same name as space {planned[norm]}, which is being imported")
+            continue
+        planned[norm] = sid
 
         # Determine a Discourse-safe category name (<=50 chars) and unique
-        safe_name = _make_unique_truncated_name(display, set(existing_names.keys()), max_len=50)
+        safe_name = _make_unique_truncated_name(
+            display, taken, max_len=50, next_suffix=suffixes
+        )
+        taken.add(_normalize(safe_name))
         if safe_name != display:
             print(f"Truncating/adjusting name '{display}' -> '{safe_name}' to fit Discourse limits or avoid collision")
-        print(f"Creating Discourse category for space '{safe_name}'...")
-
-        attempt = 0
-        while attempt < MAX_ATTEMPTS:
-            attempt += 1
-            # Use underlying _make_request to be able to get error details
-            # when rate-limited. create_category wraps _make_request; call it
-            # but if it returns None we'll attempt to surface rate-limit info
-            resp = dc.create_category(name=safe_name)
-
-            # If CreateCategoryResponse object, success path
-            if resp and getattr(resp, "category", None):
-                cat = resp.category
-                assert cat is not None
-                created.append((sid, display, cat.id, cat.name))
-                print(f"Created category: id={cat.id} name={cat.name}")
-                existing_names[_normalize(cat.name)] = cat
-
-                # Update or add mapping entry in new_mappings
-                if sid in idx_by_space:
-                    i = idx_by_space[sid]
-                    new_mappings[i]["discourse_category_id"] = cat.id
-                    new_mappings[i]["discourse_category_name"] = cat.name
-                    new_mappings[i]["google_space_display_name"] = display
-                else:
-                    mapping = {
-                        "google_space_id": sid,
-                        "google_space_display_name": display,
-                        "discourse_category_id": cat.id,
-                        "discourse_category_name": cat.name,
-                    }
-                    idx_by_space[sid] = len(new_mappings)
-                    new_mappings.append(mapping)
-                break
-
-            # If resp is None, try calling _make_request directly with allow_errors
-            # to see if we got a 429 and a Retry-After header. Use the same name
-            # we attempted to create.
-            err_info = dc._make_request("POST", "/categories.json", data={"name": safe_name}, allow_errors=True)
-            if isinstance(err_info, dict) and err_info.get("_status_code") == 429:
-                headers = err_info.get("headers", {}) or {}
-                ra = headers.get("Retry-After") or headers.get("retry-after")
-                wait = None
-                if ra:
-                    try:
-                        wait = float(ra)
-                    except Exception:
-                        # if Retry-After is a HTTP-date, fallback to exponential
-                        wait = None
-
-                if wait is None:
-                    # exponential backoff with jitter
-                    wait = BASE_BACKOFF * (2 ** (attempt - 1))
-                    # add a small jitter
-                    wait = wait + (0.1 * (attempt % 3))
-
-                print(f"Received 429 Rate Limited from Discourse. Waiting {wait:.1f}s before retry (attempt {attempt}/{MAX_ATTEMPTS})")
-                time.sleep(wait)
-                continue
-
-            # If we didn't get rate-limited, consider this a failure and stop retrying
-            print(f"Failed to create category for '{display}' (attempt {attempt})")
-            # small backoff before next attempt to avoid hammering
-            time.sleep(BASE_BACKOFF * attempt)
+        to_create.append((sid, display, safe_name))
+
+    # Creations are independent round-trips, so a few run at once; the
+    # worker count stays low to keep clear of Discourse's rate limits.
+    results = dc.map_concurrently(
+        lambda sid, display, safe_name: _create_category_with_retry(dc, display, safe_name),
+        to_create,
+        max_workers=_CREATE_WORKERS,
+    )
+
+    for (sid, display, _), cat in zip(to_create, results):
+        if cat is None:
+            continue
+        created.append((sid, display, cat.id, cat.name))
+        existing_names[_normalize(cat.name)] = cat
+
+        # Update or add the mapping entry for this space
+        mapping = mapping_by_id.get(sid)
+        if mapping is not None:
+            mapping["discourse_category_id"] = cat.id
+            mapping["discourse_category_name"] = cat.name
+            mapping["google_space_display_name"] = display
         else:
-            print(f"Giving up creating category for '{display}' after {MAX_ATTEMPTS} attempts")
+            mapping = {
+                "google_space_id": sid,
+                "google_space_display_name": display,
+                "discourse_category_id": cat.id,
+                "discourse_category_name": cat.name,
+            }
+            mapping_by_id[sid] = mapping
+            cfg.space_mappings.append(mapping)
+        mappings_changed = True
 
     print("\nSummary:")
     print(f"  Created {len(created)} categories")
     print(f"  Skipped {len(skipped)} already-existing names")
 
     # Persist mappings back to config.yaml if changed
-    if new_mappings != (cfg.space_mappings or []):
+    if mappings_changed:
+        new_mappings = cfg.space_mappings
         print(f"Writing {len(new_mappings)} mappings to {cfg.config_path}")
         try:
             import os
@@ -232,15 +282,15 @@ def main(config_path: str = "config.yaml", debug_responses: bool = False) -> Non
                 print(f"Backed up existing config to {backup_path}")
 
             with open(cfg.config_path, "r") as f:
-                raw = yaml.safe_load(f) or {}
+                raw = yaml.load(f, Loader=YamlLoader) or {}
 
             new_raw = dict(raw)
             new_raw["mappings"] = new_mappings
 
-            old_str = yaml.safe_dump(raw, sort_keys=False)
-            new_str = yaml.safe_dump(new_raw, sort_keys=False)
+            old_str = yaml.dump(raw, Dumper=YamlDumper, sort_keys=False)
+            new_str = yaml.dump(new_raw, Dumper=YamlDumper, sort_keys=False)
 
-            diff = list(difflib.unified_diff(
+            diff = [] if old_str == new_str else list(difflib.unified_diff(
                 old_str.splitlines(keepends=True),
                 new_str.splitlines(keepends=True),
                 fromfile=cfg.config_path,
@@ -265,8 +315,9 @@ def main(config_path: str = "config.yaml", debug_responses: bool = False) -> Non
                     f.write(new_str)
                 print(f"Aborted. New config written to {new_path}. Backup is at {backup_path}")
             else:
+                # Write exactly what the diff showed
                 with open(cfg.config_path, "w") as f:
-                    yaml.safe_dump(new_raw, f)
+                    f.write(new_str)
                 print("Mappings updated in config file.")
 
         except Exception as e:
@@ -9,10 +9,11 @@ Usage: run this module with the project's Python environment, e.g.:
 from __future__ import annotations
 
 # stdlib
+import itertools
 import logging
 from typing import Dict, Any, List, Optional
 
-from gchat_discourse.config_loader import Config
+from gchat_discourse.config_loader import Config, YamlDumper, YamlLoader
 from gchat_discourse.discourse_client import DiscourseClient, Category
 from gchat_discourse.google_chat_client import GoogleChatClient
 
@@ -62,7 +63,11 @@ def display_categories(categories: List[Category]) -> None:
 def flatten_category_tree(categories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     out: List[Dict[str, Any]] = []
 
-    def walk(node: Dict[str, Any], depth: int = 0):
+    # Depth-first, parents before their children, using an explicit stack of
+    # (node, depth) so deep trees do not recurse.
+    stack = [(root, 0) for root in reversed(categories)]
+    while stack:
+        node, depth = stack.pop()
         out.append(
             {
                 "id": node.get("id"),
@@ -70,11 +75,7 @@ def flatten_category_tree(categories: List[Dict[str, Any]]) -> List[Dict[str, An
                 "raw": node,
             }
         )
-        for child in node.get("children", []):
-            walk(child, depth + 1)
-
-    for root in categories:
-        walk(root, 0)
+        stack.extend((child, depth + 1) for child in reversed(node.get("children", [])))
 
     return out
 
@@ -99,29 +100,23 @@ def main(config_path: str = "config.yaml") -> None:
     gc = GoogleChatClient(
         credentials_file=cfg.google_credentials_file,
         token_file=cfg.google_token_file,
+        discovery_file=cfg.google_discovery_file,
+        auth_mode=cfg.google_auth_mode,
+        impersonate_user=cfg.google_impersonate_user,
     )
 
     # Fetch current categories and spaces
     print("Fetching Discourse categories...")
-    raw = dc._make_request("GET", "/categories.json") or {}
-    category_tree = raw.get("category_list", {}).get("categories", [])
-
-    # The categories endpoint returns a flat list and a category_tree; try to use tree if available
-    # Attempt to use a nested children tree if present, otherwise use flat categories
-    children = raw.get("category_list", {}).get("children")
-    if children:
-        flat = flatten_category_tree(children)
-        categories = [Category.from_dict(item["raw"]) for item in flat]
-    else:
-        categories = [Category.from_dict(c) for c in category_tree]
+    categories = dc.list_categories() or []
 
     display_categories(categories)
 
     print("\nFetching Google Chat spaces (you may be prompted to authenticate)...")
-    spaces = gc.list_spaces()
-    # (no separate human-readable list needed)
-
-    if not spaces:
+    # Spaces are paged in lazily; the first one is pulled up front only to
+    # tell an empty (or failed) listing apart.
+    spaces = gc.iter_spaces()
+    first_space = next(spaces, None)
+    if first_space is None:
         print("No spaces available or failed to list spaces.")
         return
 
@@ -130,7 +125,7 @@ def main(config_path: str = "config.yaml") -> None:
         cfg.space_mappings.copy() if cfg.space_mappings else []
     )
 
-    for s in spaces:
+    for s in itertools.chain((first_space,), spaces):
         # Prefer the canonical 'name' (full resource name like 'spaces/AAA'), fall back to spaceId
         sid = s.get("name") or s.get("spaceId") or s.get("space_id")
         if sid is None:
@@ -234,19 +229,19 @@ def main(config_path: str = "config.yaml") -> None:
                 print(f"Backed up existing config to {backup_path}")
 
             with open(cfg.config_path, "r") as f:
-                raw = yaml.safe_load(f) or {}
+                raw = yaml.load(f, Loader=YamlLoader) or {}
 
             # Prepare new content
             new_raw = dict(raw)
             new_raw["mappings"] = new_mappings
 
             # Produce YAML strings for diff/confirmation
-            old_str = yaml.safe_dump(raw, sort_keys=False)
-            new_str = yaml.safe_dump(new_raw, sort_keys=False)
+            old_str = yaml.dump(raw, Dumper=YamlDumper, sort_keys=False)
+            new_str = yaml.dump(new_raw, Dumper=YamlDumper, sort_keys=False)
 
             import difflib
 
-            diff = list(
+            diff = [] if old_str == new_str else list(
                 difflib.unified_diff(
                     old_str.splitlines(keepends=True),
                     new_str.splitlines(keepends=True),
@@ -281,8 +276,9 @@ def main(config_path: str = "config.yaml") -> None:
                     f"Aborted. New config written to {new_path} for inspection. Backup is at {backup_path}"
                 )
             else:
+                # Write exactly what the diff showed
                 with open(cfg.config_path, "w") as f:
-                    yaml.safe_dump(new_raw, f)
+                    f.write(new_str)
                 print("Mappings updated in config file.")
         except KeyboardInterrupt:
             pass
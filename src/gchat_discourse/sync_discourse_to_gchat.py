@@ -176,12 +176,14 @@ class DiscourseToGChatSync:
         thread_id = message.get('thread', {}).get('name', '')
         message_id = message.get('name', '')
 
-        if thread_id:
-            # Store thread-to-topic mapping
-            self.db.add_thread_topic_mapping(thread_id, topic_id, space_id)
-            
-        # Store message-to-post mapping
-        self.db.add_message_post_mapping(message_id, post_id, thread_id)
+        # Store both mappings in one transaction
+        with self.db.batch():
+            if thread_id:
+                # Store thread-to-topic mapping
+                self.db.add_thread_topic_mapping(thread_id, topic_id, space_id)
+
+            # Store message-to-post mapping
+            self.db.add_message_post_mapping(message_id, post_id, thread_id)
 
         logger.info(f"Created Google Chat thread for topic {topic_id}")
         return True
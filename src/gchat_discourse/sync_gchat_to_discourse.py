@@ -4,10 +4,11 @@ Sync logic for Google Chat to Discourse direction.
 
 import logging
 import json
-from typing import Dict, Any, Optional
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import AbstractSet, Callable, Dict, Any, Iterator, List, Optional
+from datetime import datetime, timedelta, timezone
 
-from gchat_discourse.google_chat_client import GoogleChatClient
+from gchat_discourse.google_chat_client import GoogleChatClient, created_after_filter
 from gchat_discourse.discourse_client import (
     DiscourseClient,
     CreateTopicResponse,
@@ -18,6 +19,44 @@ from gchat_discourse.user_manager import UserManager
 
 logger = logging.getLogger(__name__)
 
+# The sync cursor is stored this far behind the newest synced message, so
+# messages stamped slightly out of order are still listed next time
+_CURSOR_MARGIN = timedelta(seconds=5)
+
+
+def _with_cursor_margin(create_time: str) -> str:
+    """Return a message createTime moved back by _CURSOR_MARGIN."""
+    moment = _parse_utc(create_time)
+    if moment is None:
+        return create_time
+    return (moment - _CURSOR_MARGIN).isoformat()
+
+
+def _parse_utc(timestamp: str) -> Optional[datetime]:
+    """Parse an ISO 8601 time, taking naive values as UTC; None if unparseable."""
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+def cursor_covers(last_sync: Optional[str], create_time: Optional[str]) -> bool:
+    """
+    True if a stored sync cursor has advanced as far as a message's createTime.
+
+    The cursor is stored _CURSOR_MARGIN behind the newest settled message, so
+    it covers a message once it reaches that message's time less the margin.
+    A cursor held back by a failed message never covers newer messages.
+    """
+    if not last_sync or not create_time:
+        return False
+    cursor = _parse_utc(last_sync)
+    created = _parse_utc(create_time)
+    if cursor is None or created is None:
+        return False
+    return cursor >= created - _CURSOR_MARGIN
+
 
 def _format_response(result: object, context: Optional[str] = None, max_len: int = 1000) -> str:
     """Pretty-print a response object, truncate if too long, and log full at DEBUG.
@@ -86,7 +125,8 @@ class GChatToDiscourseSync:
 
     def __init__(self, gchat_client: GoogleChatClient, 
                  discourse_client: DiscourseClient,
-                 db: SyncDatabase):
+                 db: SyncDatabase,
+                 prefetch_workers: int = 1):
         """
         Initialize the sync handler.
 
@@ -94,11 +134,22 @@ class GChatToDiscourseSync:
             gchat_client: Google Chat API client
             discourse_client: Discourse API client
             db: Database for state management
+            prefetch_workers: Helper threads for prefetching message pages;
+                one per space synced at once keeps prefetches from queueing
         """
         self.gchat = gchat_client
         self.discourse = discourse_client
         self.db = db
         self.user_manager = UserManager(discourse_client, db)
+        # Long-lived so each helper thread keeps its keep-alive Chat transport
+        # across spaces and sweeps instead of reconnecting every listing.
+        self._prefetch = ThreadPoolExecutor(
+            max_workers=prefetch_workers, thread_name_prefix="chat-prefetch"
+        )
+
+    def close(self):
+        """Stop the page prefetch threads."""
+        self._prefetch.shutdown(wait=False, cancel_futures=True)
 
     def sync_space_to_category(self, space_id: str, 
                                category_id: Optional[int] = None,
@@ -159,10 +210,110 @@ class GChatToDiscourseSync:
             final_category_id = category_obj.id
 
         # Store mapping
-        self.db.add_space_category_mapping(space_id, final_category_id)
-        logger.info(f"Synced space {space_id} to category {final_category_id}")
-        
-        return final_category_id
+        stored_category_id = self.db.add_space_category_mapping(space_id, final_category_id)
+        logger.info(f"Synced space {space_id} to category {stored_category_id}")
+
+        return stored_category_id
+
+    def _known_message_ids(
+        self, space_id: str, since_timestamp: Optional[str]
+    ) -> AbstractSet[str]:
+        """
+        Message IDs in space_id that are already synced, for skipping a full listing.
+
+        A full listing revisits every message synced before, so those are
+        loaded with one range scan rather than looked up one at a time.
+        Filtered listings only return newer messages, which are rarely known
+        yet, so they skip the prefetch. Messages missing here (including any
+        mapped after the scan) still get the per-message check.
+        """
+        if since_timestamp:
+            return frozenset()
+        return self.db.known_message_ids(space_id)
+
+    def _iter_message_pages(
+        self, space_id: str, message_filter: Optional[str] = None
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield each page of messages in a space, prefetching the next page.
+
+        While the caller posts one page to Discourse, the request for the
+        following page is already in flight on a helper thread, so Chat and
+        Discourse round-trips overlap instead of alternating. The first page
+        is fetched on the calling thread, so single-page spaces never touch
+        the helper threads.
+
+        Args:
+            space_id: Google Chat space ID
+            message_filter: Optional list_messages filter
+        """
+        response = self.gchat.list_messages(space_id, filter=message_filter)
+        while True:
+            page_token = response.get('nextPageToken')
+            future = None
+            if page_token:
+                future = self._prefetch.submit(
+                    self.gchat.list_messages,
+                    space_id,
+                    page_token=page_token,
+                    filter=message_filter,
+                )
+            yield response.get('messages', [])
+            if future is None:
+                break
+            response = future.result()
+
+    def _sync_message_pages(
+        self,
+        space_id: str,
+        since_timestamp: Optional[str],
+        sync_one: Callable[[Dict[str, Any]], bool],
+    ) -> int:
+        """
+        Run sync_one over every listed message and advance the space's cursor.
+
+        The stored last sync time only moves up to the createTime of the
+        newest message before the first one left behind (a failed sync),
+        less _CURSOR_MARGIN. Failed messages, and any on pages lost to a
+        listing error, are then listed again on the next catch-up instead of
+        being filtered out for good; already-mapped repeats are skipped.
+
+        Args:
+            space_id: Google Chat space ID
+            since_timestamp: Only sync messages after this timestamp
+            sync_one: Syncs one message, returning True if it was synced
+
+        Returns:
+            Number of messages synced
+        """
+        synced_count = 0
+        cursor: Optional[str] = None
+        blocked = False
+        message_filter = created_after_filter(since_timestamp) if since_timestamp else None
+
+        known = self._known_message_ids(space_id, since_timestamp)
+        for messages in self._iter_message_pages(space_id, message_filter):
+            for message in messages:
+                if message.get('name') in known:
+                    done = True
+                elif sync_one(message):
+                    synced_count += 1
+                    done = True
+                else:
+                    done = self._is_settled(message)
+                if not done:
+                    blocked = True
+                elif not blocked:
+                    cursor = message.get('createTime') or cursor
+
+        if cursor:
+            self.db.update_last_sync_time(space_id, _with_cursor_margin(cursor))
+        return synced_count
+
+    def _is_settled(self, message: Dict[str, Any]) -> bool:
+        """True if a message that was not synced never needs another attempt."""
+        # Already mapped, or empty and skipped on purpose
+        return not message.get('text') or self.db.get_post_id(message.get('name', '')) is not None
 
     def sync_messages_to_posts(self, space_id: str, 
                               since_timestamp: Optional[str] = None) -> int:
@@ -194,26 +345,13 @@ class GChatToDiscourseSync:
             logger.error(f"No category mapping found for space {space_id}")
             return 0
 
-        synced_count = 0
-        page_token = None
-
-        # Fetch messages from Google Chat
-        while True:
-            response = self.gchat.list_messages(space_id, page_token=page_token)
-            messages = response.get('messages', [])
-
-            for message in messages:
-                if self._sync_message_to_post(message, space_id, category_id):
-                    synced_count += 1
-
-            page_token = response.get('nextPageToken')
-            if not page_token:
-                break
-
-        # Update last sync timestamp
-        if synced_count > 0:
-            current_time = datetime.utcnow().isoformat()
-            self.db.update_last_sync_time(space_id, current_time)
+        # Messages come oldest first, so thread starters are seen before
+        # their replies
+        synced_count = self._sync_message_pages(
+            space_id,
+            since_timestamp,
+            lambda message: self._sync_message_to_post(message, space_id, category_id),
+        )
 
         logger.info(f"Synced {synced_count} messages from space {space_id}")
         return synced_count
@@ -293,26 +431,12 @@ class GChatToDiscourseSync:
             logger.info(f"Created Discourse chat DM channel {chat_channel_id} for {space_id}")
         
         # Now sync messages to the chat channel
-        synced_count = 0
-        page_token = None
-        
-        while True:
-            response = self.gchat.list_messages(space_id, page_token=page_token)
-            messages = response.get('messages', [])
-            
-            for message in messages:
-                if self._sync_message_to_chat(message, space_id, chat_channel_id):
-                    synced_count += 1
-            
-            page_token = response.get('nextPageToken')
-            if not page_token:
-                break
-        
-        # Update last sync timestamp
-        if synced_count > 0:
-            current_time = datetime.utcnow().isoformat()
-            self.db.update_last_sync_time(space_id, current_time)
-        
+        synced_count = self._sync_message_pages(
+            space_id,
+            since_timestamp,
+            lambda message: self._sync_message_to_chat(message, space_id, chat_channel_id),
+        )
+
         logger.info(f"Synced {synced_count} DM messages from space {space_id}")
         return synced_count
 
@@ -467,13 +591,17 @@ class GChatToDiscourseSync:
                     _format_response(payload, context=f"create_topic_payload {message_id}"),
                 )
 
-            # Store thread-to-topic mapping (only if we have a valid topic_id)
-            if thread_id and isinstance(topic_id, int):
-                self.db.add_thread_topic_mapping(thread_id, topic_id, space_id)
-
-            # Store message-to-post mapping (only if we have a valid post_id)
-            if isinstance(post_id, int):
-                self.db.add_message_post_mapping(message_id, post_id, thread_id or "")
+            # Both mappings share one commit. They are not batched across the
+            # page: the webhook thread checks get_message_id to drop echoes of
+            # posts we create, so each mapping must be visible right away.
+            with self.db.batch():
+                # Store thread-to-topic mapping (only if we have a valid topic_id)
+                if thread_id and isinstance(topic_id, int):
+                    self.db.add_thread_topic_mapping(thread_id, topic_id, space_id)
+
+                # Store message-to-post mapping (only if we have a valid post_id)
+                if isinstance(post_id, int):
+                    self.db.add_message_post_mapping(message_id, post_id, thread_id or "")
             
             logger.info(f"Created topic {topic_id} for message {message_id}")
             return True
@@ -14,19 +14,25 @@ Usage:
 
 from __future__ import annotations
 
+import functools
+import itertools
 import logging
+import sys
 from typing import List, Dict, Any, Optional
 
-from gchat_discourse.config_loader import Config
-from gchat_discourse.discourse_client import DiscourseClient, Category
+from gchat_discourse.config_loader import Config, YamlDumper, YamlLoader
+from gchat_discourse.discourse_client import DiscourseClient
 from gchat_discourse.google_chat_client import GoogleChatClient
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
 
 
+@functools.lru_cache(maxsize=4096)
 def _normalize(name: Optional[str]) -> str:
-    return (name or "").strip().lower()
+    # Space and category names repeat across lookups; cache and intern the
+    # normalized form so repeats skip the strip/lower and share one string.
+    return sys.intern((name or "").strip().lower())
 
 
 def main(config_path: str = "config.yaml", debug_responses: bool = False) -> None:
@@ -50,33 +56,23 @@ def main(config_path: str = "config.yaml", debug_responses: bool = False) -> Non
     gc = GoogleChatClient(
         credentials_file=cfg.google_credentials_file,
         token_file=cfg.google_token_file,
+        discovery_file=cfg.google_discovery_file,
+        auth_mode=cfg.google_auth_mode,
+        impersonate_user=cfg.google_impersonate_user,
     )
 
     # Fetch Discourse categories
     print("Fetching Discourse categories...")
-    raw = dc._make_request("GET", "/categories.json") or {}
-    category_tree = raw.get("category_list", {}).get("categories", [])
-    children = raw.get("category_list", {}).get("children")
-
-    categories: List[Category]
-    if children:
-        def walk(node: Dict[str, Any], out: List[Category]):
-            out.append(Category.from_dict(node))
-            for c in node.get("children", []):
-                walk(c, out)
-
-        out: List[Category] = []
-        for root in children:
-            walk(root, out)
-        categories = out
-    else:
-        categories = [Category.from_dict(c) for c in category_tree]
+    categories = dc.list_categories() or []
 
     name_to_category = { _normalize(c.name): c for c in categories if c.name }
 
     print("Fetching Google Chat spaces (may prompt for auth)...")
-    spaces = gc.list_spaces()
-    if not spaces:
+    # Spaces are paged in lazily; the first one is pulled up front only to
+    # tell an empty (or failed) listing apart.
+    spaces = gc.iter_spaces()
+    first_space = next(spaces, None)
+    if first_space is None:
         print("No spaces returned or failed to list spaces.")
         return
 
@@ -90,7 +86,7 @@ def main(config_path: str = "config.yaml", debug_responses: bool = False) -> Non
     unchanged = 0
     skipped = 0
 
-    for s in spaces:
+    for s in itertools.chain((first_space,), spaces):
         sid = s.get("name") or s.get("spaceId") or s.get("space_id")
         if sid is None:
             continue
@@ -151,15 +147,15 @@ def main(config_path: str = "config.yaml", debug_responses: bool = False) -> Non
                 print(f"Backed up existing config to {backup_path}")
 
             with open(cfg.config_path, "r") as f:
-                raw = yaml.safe_load(f) or {}
+                raw = yaml.load(f, Loader=YamlLoader) or {}
 
             new_raw = dict(raw)
             new_raw["mappings"] = new_mappings
 
-            old_str = yaml.safe_dump(raw, sort_keys=False)
-            new_str = yaml.safe_dump(new_raw, sort_keys=False)
+            old_str = yaml.dump(raw, Dumper=YamlDumper, sort_keys=False)
+            new_str = yaml.dump(new_raw, Dumper=YamlDumper, sort_keys=False)
 
-            diff = list(difflib.unified_diff(
+            diff = [] if old_str == new_str else list(difflib.unified_diff(
                 old_str.splitlines(keepends=True),
                 new_str.splitlines(keepends=True),
                 fromfile=cfg.config_path,
@@ -184,8 +180,9 @@ def main(config_path: str = "config.yaml", debug_responses: bool = False) -> Non
                     f.write(new_str)
                 print(f"Aborted. New config written to {new_path}. Backup is at {backup_path}")
             else:
+                # Write exactly what the diff showed
                 with open(cfg.config_path, "w") as f:
-                    yaml.safe_dump(new_raw, f)
+                    f.write(new_str)
                 print("Mappings updated in config file.")
 
         except Exception as e:
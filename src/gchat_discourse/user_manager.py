@@ -4,6 +4,8 @@ User management module for syncing users between Google Chat and Discourse.
 
 import logging
 import re
+import secrets
+import threading
 from typing import Optional, Dict, Any
 
 from gchat_discourse.discourse_client import DiscourseClient
@@ -77,6 +79,9 @@ class UserManager:
         """
         self.discourse = discourse_client
         self.db = db
+        # Serializes user creation so spaces synced in parallel cannot both
+        # create a Discourse account for the same sender.
+        self._create_lock = threading.Lock()
 
     def get_or_create_discourse_user(
         self, gchat_sender: Dict[str, Any]
@@ -104,7 +109,17 @@ class UserManager:
             logger.debug(f"Found existing mapping: {gchat_user_id} -> {discourse_username}")
             return discourse_username
 
-        # Need to create a new user
+        with self._create_lock:
+            # Another thread may have created the user while we waited
+            discourse_username = self.db.get_discourse_username(gchat_user_id)
+            if discourse_username:
+                return discourse_username
+            return self._create_discourse_user(gchat_user_id, gchat_sender)
+
+    def _create_discourse_user(
+        self, gchat_user_id: str, gchat_sender: Dict[str, Any]
+    ) -> Optional[str]:
+        """Create a Discourse user for a Google Chat sender and store the mapping."""
         display_name = gchat_sender.get('displayName', 'Unknown User')
         gchat_email = gchat_sender.get('email')
         
@@ -119,7 +134,6 @@ class UserManager:
 
         # Try to create the user in Discourse
         # Generate a random password - user won't use it for login in this integration
-        import secrets
         password = secrets.token_urlsafe(32)
 
         user_response = self.discourse.create_user(
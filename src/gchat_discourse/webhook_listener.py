@@ -2,13 +2,31 @@
 Webhook listener for receiving real-time updates from Discourse.
 """
 
+import json
 import logging
 from flask import Flask, request, jsonify
-from typing import Callable, Dict, Any
+from typing import Callable, Dict, Any, Optional
+from werkzeug.serving import BaseWSGIServer, make_server
+
+# Parse webhook bodies with orjson when it is installed; it decodes straight
+# from bytes without building an intermediate str.
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+def _parse_payload(body: bytes) -> Any:
+    """Decode a webhook request body, returning None when it is empty."""
+    if not body:
+        return None
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
 class WebhookListener:
     """Flask-based webhook listener for Discourse events."""
 
@@ -25,6 +43,7 @@ class WebhookListener:
         self.port = port
         self.post_handler = None
         self.topic_handler = None
+        self._server: Optional[BaseWSGIServer] = None
         
         # Setup routes
         self._setup_routes()
@@ -37,7 +56,7 @@ class WebhookListener:
             """Handle incoming webhook from Discourse."""
             try:
                 # Get the webhook payload
-                payload = request.json
+                payload = _parse_payload(request.get_data(cache=False))
                 
                 if not payload:
                     logger.warning("Received empty webhook payload")
@@ -130,6 +149,19 @@ class WebhookListener:
         logger.info("Topic handler registered")
 
     def run(self):
-        """Start the webhook listener server."""
+        """
+        Serve webhooks until shutdown() is called.
+
+        Each request is handled on its own thread; handlers only queue the
+        event, so a burst of deliveries is acknowledged without waiting on
+        the syncs it triggers.
+        """
         logger.info(f"Starting webhook listener on {self.host}:{self.port}")
-        self.app.run(host=self.host, port=self.port, debug=False)
+        self._server = make_server(self.host, self.port, self.app, threaded=True)
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """Stop a running server from another thread, making run() return."""
+        server = self._server
+        if server is not None:
+            server.shutdown()
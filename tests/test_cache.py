@@ -0,0 +1,49 @@
+"""Tests for the in-process caches."""
+
+from gchat_discourse import cache as cache_module
+from gchat_discourse.cache import LRUCache, TTLCache
+
+
+def test_lru_cache_get_and_set():
+    """Test basic get/set/pop behaviour."""
+    cache = LRUCache(maxsize=10)
+    assert cache.get("a") is None
+    assert cache.get("a", 0) == 0
+
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert "a" in cache
+    assert len(cache) == 1
+
+    assert cache.pop("a") == 1
+    assert "a" not in cache
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test that the least recently used entry is evicted once full."""
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Touch "a" so "b" becomes the oldest entry
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    """Test that entries disappear once their TTL has passed."""
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set("a", 1)
+    now[0] += 4
+    assert cache.get("a") == 1
+    assert "a" in cache
+
+    now[0] += 2
+    assert cache.get("a") is None
+    assert "a" not in cache
@@ -0,0 +1,127 @@
+"""Tests for config.yaml loading and validation."""
+
+import pytest
+
+from gchat_discourse.config_loader import Config
+
+VALID = """
+discourse:
+  url: https://forum.example.com
+  api_key: KEY
+  api_username: system
+google:
+  credentials_file: credentials.json
+  token_file: token.json
+sync_settings:
+  poll_interval_minutes: 5
+mappings:
+  - google_space_id: spaces/A
+    discourse_category_id: 1
+"""
+
+
+def write(tmp_path, text):
+    path = tmp_path / "config.yaml"
+    path.write_text(text)
+    return str(path)
+
+
+def test_valid_config_loads(tmp_path):
+    """Test that a complete config validates and exposes its values."""
+    config = Config(write(tmp_path, VALID))
+    assert config.discourse_url == "https://forum.example.com"
+    assert config.get_mapping_for_space("spaces/A")["discourse_category_id"] == 1
+    assert config.sync_workers == 8
+
+
+def test_missing_section_is_rejected(tmp_path):
+    """Test that a missing section names the section."""
+    text = VALID.replace("sync_settings:\n  poll_interval_minutes: 5\n", "")
+    with pytest.raises(ValueError, match="section: sync_settings"):
+        Config(write(tmp_path, text))
+
+
+def test_missing_field_is_rejected(tmp_path):
+    """Test that a missing field names the field and its section."""
+    text = VALID.replace("  api_key: KEY\n", "")
+    with pytest.raises(ValueError, match="'api_key' in section 'discourse'"):
+        Config(write(tmp_path, text))
+
+
+def test_empty_file_is_rejected(tmp_path):
+    """Test that an empty file raises ValueError rather than TypeError."""
+    with pytest.raises(ValueError):
+        Config(write(tmp_path, ""))
+
+
+def test_unchanged_file_is_not_reparsed(tmp_path, monkeypatch):
+    """Test that a second load of an unchanged file reuses the parsed document."""
+    import os
+
+    from gchat_discourse import config_loader
+
+    path = write(tmp_path, VALID)
+    first = Config(path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("config was parsed again")
+
+    monkeypatch.setattr(config_loader.yaml, "load", fail)
+    second = Config(path)
+    assert second.config == first.config
+
+    # Each Config gets its own copy, so edits do not leak between instances
+    second.config["discourse"]["url"] = "https://other.example.com"
+    assert Config(path).config["discourse"]["url"] == "https://forum.example.com"
+
+    # A modified file is parsed again
+    monkeypatch.undo()
+    with open(path, "a") as f:
+        f.write("  - google_space_id: spaces/B\n")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert "spaces/B" in Config(path).space_mapping_by_id
+
+
+
+def test_space_mapping_index_skips_bad_entries(tmp_path):
+    """Test that mappings are indexed by space ID, dropping unnamed and duplicate entries."""
+    text = VALID + """  - discourse_category_id: 2
+  - google_space_id: spaces/A
+    discourse_category_id: 3
+"""
+    config = Config(write(tmp_path, text))
+    assert list(config.space_mapping_by_id) == ["spaces/A"]
+    assert config.space_mapping_by_id["spaces/A"]["discourse_category_id"] == 1
+
+
+def test_mapping_edits_stay_with_their_config(tmp_path):
+    """Test that editing and appending mappings (as the import script does) does not leak."""
+    path = write(tmp_path, VALID)
+    first = Config(path)
+    first.space_mapping_by_id["spaces/A"]["discourse_category_id"] = 9
+    added = {"google_space_id": "spaces/B", "discourse_category_id": 2}
+    first.space_mapping_by_id["spaces/B"] = added
+    first.space_mappings.append(added)
+
+    second = Config(path)
+    assert second.space_mappings == [{"google_space_id": "spaces/A", "discourse_category_id": 1}]
+    assert list(second.space_mapping_by_id) == ["spaces/A"]
+
+
+@pytest.mark.parametrize("interval", ["0", "-5", "soon"])
+def test_non_positive_poll_interval_is_rejected(tmp_path, interval):
+    """Test that a poll interval the scheduler cannot wait on is rejected at load."""
+    text = VALID.replace("poll_interval_minutes: 5", f"poll_interval_minutes: {interval}")
+    with pytest.raises(ValueError, match="poll_interval_minutes"):
+        Config(write(tmp_path, text))
+
+
+@pytest.mark.parametrize("workers", ["0", "-1", "2.5", "true", "many"])
+def test_invalid_sync_workers_is_rejected(tmp_path, workers):
+    """Test that sync_workers must be a positive integer, checked at load."""
+    text = VALID.replace(
+        "poll_interval_minutes: 5", f"poll_interval_minutes: 5\n  sync_workers: {workers}"
+    )
+    with pytest.raises(ValueError, match="sync_workers"):
+        Config(write(tmp_path, text))
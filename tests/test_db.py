@@ -0,0 +1,242 @@
+"""Tests for the SQLite sync state database."""
+
+import pytest
+
+from gchat_discourse.db import SyncDatabase
+
+
+@pytest.fixture
+def db(tmp_path):
+    database = SyncDatabase(str(tmp_path / "sync.sqlite"))
+    yield database
+    database.close()
+
+
+def test_mappings_round_trip(db):
+    """Test forward and reverse lookups for each mapping type."""
+    db.add_space_category_mapping("spaces/A", 10)
+    db.add_thread_topic_mapping("spaces/A/threads/T", 20, "spaces/A")
+    db.add_message_post_mapping("spaces/A/messages/M", 30, "spaces/A/threads/T")
+    db.add_user_mapping("users/1", "alice", "Alice", "alice@example.com")
+    db.add_dm_channel_mapping("spaces/DM", 40)
+
+    assert db.get_category_id("spaces/A") == 10
+    assert db.get_space_id(10) == "spaces/A"
+    assert db.get_topic_id("spaces/A/threads/T") == 20
+    assert db.get_thread_id(20) == "spaces/A/threads/T"
+    assert db.get_post_id("spaces/A/messages/M") == 30
+    assert db.get_message_id(30) == "spaces/A/messages/M"
+    assert db.get_discourse_username("users/1") == "alice"
+    assert db.get_gchat_user_id("alice") == "users/1"
+    assert db.get_dm_chat_channel_id("spaces/DM") == 40
+    assert db.get_dm_space_id(40) == "spaces/DM"
+
+    assert db.get_category_id("spaces/missing") is None
+    assert db.get_message_id(999) is None
+
+
+def test_journal_mode_is_wal(db):
+    """Test that the database is opened in WAL mode."""
+    mode = db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+    assert db.conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+
+
+def test_batch_commits_once_on_exit(db, tmp_path):
+    """Test that writes inside batch() are only visible to other connections after exit."""
+    other = SyncDatabase(str(tmp_path / "sync.sqlite"))
+    try:
+        with db.batch():
+            db.add_message_post_mapping("spaces/A/messages/1", 1, "")
+            db.add_message_post_mappings(
+                [("spaces/A/messages/2", 2, ""), ("spaces/A/messages/3", 3, "")]
+            )
+            assert other.get_post_id("spaces/A/messages/1") is None
+
+        assert other.get_post_id("spaces/A/messages/1") == 1
+        assert other.get_post_id("spaces/A/messages/3") == 3
+    finally:
+        other.close()
+
+
+def test_batch_takes_write_lock_up_front(db, tmp_path):
+    """Test that batch() holds the write lock for its whole block."""
+    import sqlite3
+
+    other = sqlite3.connect(str(tmp_path / "sync.sqlite"), timeout=0)
+    try:
+        with db.batch():
+            with pytest.raises(sqlite3.OperationalError):
+                other.execute("BEGIN IMMEDIATE")
+        other.execute("BEGIN IMMEDIATE")
+        other.rollback()
+    finally:
+        other.close()
+
+
+def test_batch_commits_when_block_raises(db, tmp_path):
+    """Test that mappings written before an error are still persisted."""
+    with pytest.raises(RuntimeError):
+        with db.batch():
+            db.add_space_category_mapping("spaces/A", 10)
+            raise RuntimeError("boom")
+
+    other = SyncDatabase(str(tmp_path / "sync.sqlite"))
+    try:
+        assert other.get_category_id("spaces/A") == 10
+    finally:
+        other.close()
+
+
+def test_reverse_lookups_use_index(db):
+    """Test that reverse lookups search an index instead of scanning the table."""
+    plan = db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT google_message_id FROM message_to_post WHERE discourse_post_id = ?",
+        (1,),
+    ).fetchall()
+    assert any("USING INDEX idx_message_to_post_post" in row[-1] for row in plan)
+
+    plan = db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT gchat_user_id FROM user_mapping WHERE discourse_username = ?",
+        ("alice",),
+    ).fetchall()
+    assert any("USING INDEX idx_user_mapping_username" in row[-1] for row in plan)
+
+
+def test_lookups_are_served_from_cache(db):
+    """Test that repeated lookups do not go back to SQLite."""
+    db.add_message_post_mapping("spaces/A/messages/M", 30, "")
+    db.conn.execute("DELETE FROM message_to_post")
+    assert db.get_post_id("spaces/A/messages/M") == 30
+
+
+def test_add_returns_stored_id(db):
+    """Test that add_* return the stored ID so callers can skip a follow-up lookup."""
+    assert db.add_space_category_mapping("spaces/A", 10) == 10
+    assert db.add_thread_topic_mapping("spaces/A/threads/T", 20, "spaces/A") == 20
+    assert db.add_message_post_mapping("spaces/A/messages/M", 30, "") == 30
+    assert db.add_dm_channel_mapping("spaces/DM", 40) == 40
+
+
+def test_caches_are_warmed_on_open(db, tmp_path):
+    """Test that reopening the database preloads existing mappings into the caches."""
+    db.add_space_category_mapping("spaces/A", 10)
+    db.add_message_post_mapping("spaces/A/messages/M", 30, "")
+
+    reopened = SyncDatabase(str(tmp_path / "sync.sqlite"))
+    try:
+        assert "spaces/A" in reopened._categories.forward
+        assert reopened._posts.forward.get("spaces/A/messages/M") == 30
+    finally:
+        reopened.close()
+
+
+def test_bulk_adds_commit_once(db, tmp_path):
+    """Test that the bulk add_* methods persist every row and populate the caches."""
+    db.add_space_category_mappings([("spaces/A", 1), ("spaces/B", 2)])
+    db.add_thread_topic_mappings([("spaces/A/threads/T", 3, "spaces/A")])
+    db.add_dm_channel_mappings([("spaces/DM", 4)])
+
+    assert db._categories.forward.get("spaces/B") == 2
+    other = SyncDatabase(str(tmp_path / "sync.sqlite"))
+    try:
+        assert other.get_space_id(1) == "spaces/A"
+        assert other.get_thread_id(3) == "spaces/A/threads/T"
+        assert other.get_dm_space_id(4) == "spaces/DM"
+    finally:
+        other.close()
+
+
+def test_each_thread_uses_its_own_connection(db):
+    """Test that worker threads get separate connections that still see each other's writes."""
+    import threading
+
+    seen = {}
+
+    def worker():
+        seen["conn"] = db.conn
+        db.add_space_category_mapping("spaces/T", 7)
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert seen["conn"] is not db.conn
+    assert db.get_space_id(7) == "spaces/T"
+
+
+def test_reverse_and_user_lookups_are_cached_and_remapped(db):
+    """Test that reverse/user lookups hit the cache and a remap evicts the stale reverse entry."""
+    db.add_space_category_mapping("spaces/A", 10)
+    db.add_user_mapping("users/1", "alice")
+    db.conn.execute("DELETE FROM space_to_category")
+    db.conn.execute("DELETE FROM user_mapping")
+    assert db.get_space_id(10) == "spaces/A"
+    assert db.get_gchat_user_id("alice") == "users/1"
+
+    db.add_space_category_mapping("spaces/A", 11)
+    db.add_user_mapping("users/1", "alice2")
+    assert db.get_space_id(10) is None
+    assert db.get_space_id(11) == "spaces/A"
+    assert db.get_gchat_user_id("alice") is None
+    assert db.get_discourse_username("users/1") == "alice2"
+
+
+def test_get_last_sync_times_returns_requested_spaces(db):
+    """Test that sync times for many spaces come back from one call."""
+    db.update_last_sync_time("spaces/A", "2024-01-01T00:00:00+00:00")
+    db.update_last_sync_time("spaces/B", "2024-01-02T00:00:00+00:00")
+
+    assert db.get_last_sync_times(["spaces/A", "spaces/missing"]) == {
+        "spaces/A": "2024-01-01T00:00:00+00:00"
+    }
+
+
+def test_remap_updates_row_in_place(db):
+    """Test that re-adding a mapping updates the existing row instead of replacing it."""
+    db.add_message_post_mapping("spaces/A/messages/M", 30, "")
+    rowid = db.conn.execute("SELECT rowid FROM message_to_post").fetchone()[0]
+
+    db.add_message_post_mapping("spaces/A/messages/M", 31, "spaces/A/threads/T")
+
+    rows = db.conn.execute(
+        "SELECT rowid, discourse_post_id, google_thread_id FROM message_to_post"
+    ).fetchall()
+    assert rows == [(rowid, 31, "spaces/A/threads/T")]
+
+
+def test_known_message_ids_covers_only_the_space(db):
+    """Test that known_message_ids returns a space's mapped messages and nothing else."""
+    db.add_message_post_mapping("spaces/A/messages/1", 1, "spaces/A/threads/T")
+    db.add_message_post_mapping("spaces/A/messages/2", 2, "")
+    db.add_message_post_mapping("spaces/AB/messages/3", 3, "")
+
+    assert db.known_message_ids("spaces/A") == {"spaces/A/messages/1", "spaces/A/messages/2"}
+    plan = db.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT google_message_id FROM message_to_post "
+        "WHERE google_message_id >= ? AND google_message_id < ?",
+        ("a", "b"),
+    ).fetchall()
+    assert not any(row[-1].startswith("SCAN") for row in plan)
+
+
+def test_thread_connections_close_when_threads_exit(db):
+    """Test that a finished thread's connection is closed and no longer tracked."""
+    import sqlite3
+    import threading
+
+    seen = []
+
+    def worker():
+        seen.append(db.conn)
+        db.get_category_id("spaces/A")
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert db._connections == {db.conn}
+    with pytest.raises(sqlite3.ProgrammingError):
+        seen[0].execute("SELECT 1")
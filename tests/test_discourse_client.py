@@ -6,29 +6,28 @@ def test_make_request_includes_api_headers(monkeypatch):
 
     recorded = {}
 
-    def fake_request(method, url, headers=None, json=None, params=None, timeout=None):
+    def fake_request(self, method, url, headers=None, data=None, params=None, timeout=None):
         # record the call
         recorded['method'] = method
         recorded['url'] = url
-        recorded['headers'] = headers
-        recorded['json'] = json
+        # requests merges per-call headers over the session's defaults
+        recorded['headers'] = {**self.headers, **(headers or {})}
+        recorded['data'] = data
         recorded['params'] = params
         recorded['timeout'] = timeout
 
         class FakeResponse:
             status_code = 200
+            content = b'{"categories": []}'
 
             def raise_for_status(self):
                 return None
 
-            def json(self):
-                return {"categories": []}
-
         return FakeResponse()
 
-    # Patch the requests.request used in the module
+    # Patch the pooled session used by the client
     monkeypatch.setattr(
-        'gchat_discourse.discourse_client.requests.request', fake_request
+        'gchat_discourse.discourse_client.requests.Session.request', fake_request
     )
 
     from gchat_discourse.discourse_client import DiscourseClient
@@ -44,27 +43,26 @@ def test_make_request_includes_api_headers(monkeypatch):
     assert recorded['headers']['Api-Key'] == 'APIKEY123'
     assert recorded['headers']['Api-Username'] == 'apiuser'
     assert recorded['headers']['Content-Type'] == 'application/json'
+    assert recorded['data'] is None
 
 
 def test_make_request_handles_base_url_without_trailing_slash(monkeypatch):
     recorded = {}
 
-    def fake_request(method, url, headers=None, json=None, params=None, timeout=None):
+    def fake_request(self, method, url, headers=None, data=None, params=None, timeout=None):
         recorded['url'] = url
 
         class FakeResponse:
             status_code = 200
+            content = b'{"ok": true}'
 
             def raise_for_status(self):
                 return None
 
-            def json(self):
-                return {"ok": True}
-
         return FakeResponse()
 
     monkeypatch.setattr(
-        'gchat_discourse.discourse_client.requests.request', fake_request
+        'gchat_discourse.discourse_client.requests.Session.request', fake_request
     )
 
     from gchat_discourse.discourse_client import DiscourseClient
@@ -72,3 +70,409 @@ def test_make_request_handles_base_url_without_trailing_slash(monkeypatch):
     client = DiscourseClient('http://example.com', 'K', 'u')
     _ = client._make_request('GET', 'categories.json')
     assert recorded['url'] == 'http://example.com/categories.json'
+
+
+def test_map_concurrently_preserves_order():
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    results = client.map_concurrently(lambda a, b: a * b, [(1, 2), (3, 4), (5, 6)])
+    assert results == [2, 12, 30]
+
+
+def test_make_request_encodes_json_body(monkeypatch):
+    import json
+
+    recorded = {}
+
+    def fake_request(self, method, url, headers=None, data=None, params=None, timeout=None):
+        recorded['data'] = data
+
+        class FakeResponse:
+            status_code = 200
+            content = b'{"id": 1}'
+
+            def raise_for_status(self):
+                return None
+
+        return FakeResponse()
+
+    monkeypatch.setattr(
+        'gchat_discourse.discourse_client.requests.Session.request', fake_request
+    )
+
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    result = client._make_request('POST', '/posts.json', data={"topic_id": 5, "raw": "héllo"})
+
+    assert result == {"id": 1}
+    assert isinstance(recorded['data'], bytes)
+    assert json.loads(recorded['data']) == {"topic_id": 5, "raw": "héllo"}
+
+
+def test_retry_honors_retry_after_and_logs(caplog):
+    """Rate-limited responses are retried, honoring Retry-After, with a WARNING per attempt."""
+    from urllib3.response import HTTPResponse
+
+    from gchat_discourse.discourse_client import _RETRY
+
+    response = HTTPResponse(status=429, headers={"Retry-After": "7"}, preload_content=False)
+    assert _RETRY.is_retry("POST", 429, has_retry_after=True)
+
+    with caplog.at_level("WARNING", logger="gchat_discourse.discourse_client"):
+        retry = _RETRY.increment("POST", "/posts.json", response=response)
+
+    assert retry.total == 4
+    assert retry.get_retry_after(response) == 7
+    assert "Retrying POST /posts.json (429)" in caplog.text
+
+
+def test_create_post_sends_prebuilt_json(monkeypatch):
+    """create_post's templated body must be valid JSON with the raw text escaped."""
+    import json
+
+    recorded = {}
+
+    def fake_request(self, method, url, headers=None, data=None, params=None, timeout=None):
+        recorded['data'] = data
+
+        class FakeResponse:
+            status_code = 200
+            content = b'{"id": 5, "topic_id": 3}'
+
+            def raise_for_status(self):
+                return None
+
+        return FakeResponse()
+
+    monkeypatch.setattr(
+        'gchat_discourse.discourse_client.requests.Session.request', fake_request
+    )
+
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    client = DiscourseClient('http://example.com', 'k', 'u')
+    raw = 'quote " backslash \\ newline\n unicode é'
+    client.create_post(3, raw)
+
+    assert json.loads(recorded['data']) == {"topic_id": 3, "raw": raw}
+
+
+def test_impersonation_overrides_session_username(monkeypatch):
+    """Only the Api-Username override is sent per call; auth headers come from the session."""
+    import requests
+
+    sent = []
+
+    def fake_send(self, request, **kwargs):
+        sent.append(request.headers)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b"{}"
+        return response
+
+    monkeypatch.setattr("gchat_discourse.discourse_client.requests.Session.send", fake_send)
+
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    with DiscourseClient("http://example.com", "K", "system") as client:
+        client._make_request("GET", "/latest.json")
+        client._make_request("GET", "/latest.json", impersonate_username="alice")
+
+    assert sent[0]["Api-Username"] == "system"
+    assert sent[1]["Api-Username"] == "alice"
+    assert sent[1]["Api-Key"] == "K"
+
+
+def test_list_posts_response_builds_slotted_posts():
+    from gchat_discourse.discourse_client import ListPostsResponse
+
+    resp = ListPostsResponse.from_dict(
+        {'id': 5, 'title': 'T', 'post_stream': {'posts': [{'id': 1, 'topic_id': 5, 'raw': 'hi'}]}}
+    )
+    assert resp.topic.id == 5
+    assert [(p.id, p.topic_id, p.raw) for p in resp.posts] == [(1, 5, 'hi')]
+    assert not hasattr(resp.posts[0], '__dict__')
+
+
+def test_topic_from_dict_falls_back_to_alias_keys():
+    from gchat_discourse.discourse_client import Topic
+
+    topic = Topic.from_dict(
+        {'topic_id': 7, 'fancy_title': 'Hi', 'post_count': 3, 'category': 2, 'views': 9}
+    )
+    assert (topic.id, topic.title, topic.posts_count, topic.category_id, topic.views) == (
+        7, 'Hi', 3, 2, 9
+    )
+    assert topic.excerpt is None
+
+
+def test_models_drop_source_payload_unless_keep_raw(monkeypatch):
+    from gchat_discourse import discourse_client
+    from gchat_discourse.discourse_client import ListPostsResponse
+
+    data = {'id': 5, 'post_stream': {'posts': [{'id': 1, 'raw': 'hi'}]}}
+    resp = ListPostsResponse.from_dict(data)
+    assert resp.raw is None and resp.topic.raw is None
+    assert resp.posts[0].raw_meta is None and resp.posts[0].raw == 'hi'
+
+    monkeypatch.setattr(discourse_client, 'KEEP_RAW', True)
+    resp = ListPostsResponse.from_dict(data)
+    assert resp.raw is data
+    assert resp.posts[0].raw_meta is data['post_stream']['posts'][0]
+
+
+def test_get_posts_returns_results_in_input_order(monkeypatch):
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    def fake_make_request(self, method, endpoint, **kwargs):
+        post_id = int(endpoint.rsplit('/', 1)[1].split('.')[0])
+        return {'id': post_id, 'topic_id': 1}
+
+    monkeypatch.setattr(DiscourseClient, '_make_request', fake_make_request)
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    results = client.get_posts([3, 1, 2])
+    assert [r.post.id for r in results] == [3, 1, 2]
+
+
+def test_get_users_bulk_dedupes_and_skips_missing(monkeypatch):
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    calls = []
+
+    def fake_make_request(self, method, endpoint, **kwargs):
+        calls.append(endpoint)
+        username = endpoint.rsplit('/', 1)[1][: -len('.json')]
+        return None if username == 'ghost' else {'user': {'id': 1, 'username': username}}
+
+    monkeypatch.setattr(DiscourseClient, '_make_request', fake_make_request)
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    users = client.get_users_bulk(['alice', 'ghost', 'alice', 'bob'])
+    assert sorted(users) == ['alice', 'bob']
+    assert users['bob'].user.username == 'bob'
+    assert len(calls) == 3
+
+
+def test_get_topic_is_cached_until_topic_changes(monkeypatch):
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    calls = []
+
+    def fake_make_request(self, method, endpoint, **kwargs):
+        calls.append((method, endpoint))
+        return {'id': 4, 'title': 'T'}
+
+    monkeypatch.setattr(DiscourseClient, '_make_request', fake_make_request)
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    assert client.get_topic(4) is client.get_topic(4)
+    assert calls == [('GET', '/t/4.json')]
+
+    client.create_post(4, 'reply')
+    client.get_topic(4)
+    assert calls[-1] == ('GET', '/t/4.json') and len(calls) == 3
+
+    client.clear_cache()
+    client.get_topic(4)
+    assert len(calls) == 4
+
+
+def test_non_json_error_body_is_truncated(monkeypatch, caplog):
+    import requests
+
+    class FakeResponse:
+        status_code = 502
+        headers = {'Content-Type': 'text/html'}
+        content = b'<html>' + b'x' * 5000
+        text = content.decode()
+
+        def raise_for_status(self):
+            raise requests.exceptions.HTTPError('502 Bad Gateway', response=self)
+
+    monkeypatch.setattr(
+        'gchat_discourse.discourse_client.requests.Session.request',
+        lambda self, *args, **kwargs: FakeResponse(),
+    )
+
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    err = client._make_request('GET', '/x.json', allow_errors=True)
+    assert err['_status_code'] == 502
+    assert err['body']['_text'] == FakeResponse.text[:1024]
+    assert all(len(r.getMessage()) < 2000 for r in caplog.records)
+
+
+def test_delete_post_does_not_decode_body(monkeypatch):
+    class FakeResponse:
+        status_code = 200
+        content = b'not json'
+
+        def raise_for_status(self):
+            return None
+
+    monkeypatch.setattr(
+        'gchat_discourse.discourse_client.requests.Session.request',
+        lambda self, *args, **kwargs: FakeResponse(),
+    )
+
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    assert client.delete_post(5) is True
+    assert client._make_request_raw('GET', 'x.json').content == b'not json'
+
+
+def test_post_is_only_retried_when_rate_limited():
+    """A POST may have taken effect on 5xx or a read error, so only 429 is resent."""
+    import pytest
+    from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+
+    from gchat_discourse.discourse_client import _RETRY
+
+    assert _RETRY.is_retry("POST", 429)
+    assert not _RETRY.is_retry("POST", 503)
+    assert _RETRY.is_retry("GET", 503)
+
+    error = ReadTimeoutError(None, "/posts.json", "timed out")
+    with pytest.raises((MaxRetryError, ReadTimeoutError)):
+        _RETRY.increment("POST", "/posts.json", error=error)
+    assert _RETRY.increment("GET", "/t/1.json", error=error).total == 4
+
+
+def test_create_category_sends_prebuilt_json(monkeypatch):
+    import json
+
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    sent = []
+
+    def fake_make_request(self, method, endpoint, **kwargs):
+        sent.append(json.loads(kwargs['body']))
+        return {'category': {'id': 9, 'name': 'x'}}
+
+    monkeypatch.setattr(DiscourseClient, '_make_request', fake_make_request)
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    client.create_category('Team "A"')
+    client.create_category('Sub', parent_category_id=4)
+    client.create_category('Sub2', parent_category_id='5')
+    assert sent == [
+        {'name': 'Team "A"', 'color': '0088CC', 'text_color': 'FFFFFF'},
+        {'name': 'Sub', 'color': '0088CC', 'text_color': 'FFFFFF', 'parent_category_id': 4},
+        {'name': 'Sub2', 'color': '0088CC', 'text_color': 'FFFFFF', 'parent_category_id': '5'},
+    ]
+
+
+def test_iter_topics_in_category_follows_pages(monkeypatch):
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    pages = {
+        0: {'topic_list': {'topics': [{'id': 1}, {'id': 2}], 'more_topics_url': '/c/3?page=1'}},
+        1: {'topic_list': {'topics': [{'id': 3}]}},
+    }
+    requested = []
+
+    def fake_make_request(self, method, endpoint, params=None, **kwargs):
+        requested.append(params['page'])
+        return pages[params['page']]
+
+    monkeypatch.setattr(DiscourseClient, '_make_request', fake_make_request)
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    topics = client.iter_topics_in_category(3)
+    assert next(topics).id == 1
+    assert requested == [0]
+    assert [t.id for t in topics] == [2, 3]
+    assert requested == [0, 1]
+
+
+def test_try_create_category_reports_error_without_second_post(monkeypatch):
+    import requests
+
+    calls = []
+
+    class FakeResponse:
+        status_code = 429
+        headers = {'Retry-After': '3'}
+        content = b'{"errors": ["slow down"]}'
+
+        def raise_for_status(self):
+            raise requests.exceptions.HTTPError('429', response=self)
+
+    def fake_request(self, *args, **kwargs):
+        calls.append(kwargs['method'])
+        return FakeResponse()
+
+    monkeypatch.setattr('gchat_discourse.discourse_client.requests.Session.request', fake_request)
+
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    resp, err = client.try_create_category('A')
+    assert resp is None
+    assert err['_status_code'] == 429 and err['headers']['Retry-After'] == '3'
+    assert client.create_category('B') is None
+    assert calls == ['POST', 'POST']
+
+
+def test_list_categories_flattens_subcategories(monkeypatch):
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    seen = {}
+
+    def fake_make_request(self, method, endpoint, params=None, **kwargs):
+        seen['params'] = params
+        return {'category_list': {'categories': [
+            {'id': 1, 'name': 'a', 'subcategory_list': [{'id': 2, 'name': 'b'}]},
+            {'id': 3, 'name': 'c'},
+        ]}}
+
+    monkeypatch.setattr(DiscourseClient, '_make_request', fake_make_request)
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    assert [c.id for c in client.list_categories()] == [1, 2, 3]
+    assert seen['params'] == {'include_subcategories': 'true'}
+
+
+def test_urls_accept_string_ids_and_slugs(monkeypatch):
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    calls = []
+
+    def fake_make_request(self, method, endpoint, **kwargs):
+        calls.append(endpoint)
+        return {'category': {'id': 12, 'name': 'General'}}
+
+    monkeypatch.setattr(DiscourseClient, '_make_request', fake_make_request)
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    client.get_category('12')
+    client.get_category('general')
+    client.get_topic('7')
+    assert calls == ['/c/12/show.json', '/c/general/show.json', '/t/7.json']
+
+
+def test_templated_bodies_accept_string_ids(monkeypatch):
+    import json
+
+    from gchat_discourse.discourse_client import DiscourseClient
+
+    sent = []
+
+    def fake_make_request(self, method, endpoint, **kwargs):
+        sent.append(json.loads(kwargs['body']))
+        return {'id': 1, 'topic_id': 2, 'topic_slug': 's'}
+
+    monkeypatch.setattr(DiscourseClient, '_make_request', fake_make_request)
+
+    client = DiscourseClient('http://example.com', 'K', 'u')
+    client.create_topic('T', 'body', '12')
+    client.create_post('7', 'reply')
+    assert sent == [
+        {'title': 'T', 'raw': 'body', 'category': '12'},
+        {'topic_id': '7', 'raw': 'reply'},
+    ]
@@ -0,0 +1,344 @@
+"""Tests for GoogleChatClient helpers that do not touch the network."""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from gchat_discourse.cache import TTLCache
+from gchat_discourse.google_chat_client import GoogleChatClient
+
+
+class FakeCreds:
+    def __init__(self, expires_in):
+        self.token = "old"
+        self.expiry = _utcnow() + expires_in
+        self.refresh_calls = 0
+        self.refresh_requests = []
+
+    @property
+    def valid(self):
+        # Mirrors google-auth, which treats tokens as invalid shortly before expiry
+        return self.token is not None and self.expiry - timedelta(minutes=4) > _utcnow()
+
+    def refresh(self, request):
+        self.refresh_calls += 1
+        self.refresh_requests.append(request)
+        self.token = "new"
+        self.expiry = _utcnow() + timedelta(hours=1)
+
+    def to_json(self):
+        return json.dumps({"token": self.token})
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@pytest.fixture
+def make_client(tmp_path):
+    def make(creds):
+        client = object.__new__(GoogleChatClient)
+        client.token_file = str(tmp_path / "token.json")
+        client.creds = creds
+        client.auth_mode = "oauth"
+        client._refresh_lock = threading.Lock()
+        client._auth_request = object()
+        client._local = threading.local()
+        client._space_cache = TTLCache(16, 60)
+        client._message_cache = TTLCache(16, 60)
+        return client
+
+    return make
+
+
+def test_fresh_token_is_not_refreshed(make_client):
+    """Test that a token far from expiry is used as-is."""
+    creds = FakeCreds(timedelta(minutes=30))
+    make_client(creds)._ensure_fresh()
+    assert creds.refresh_calls == 0
+
+
+def test_expiring_token_is_refreshed_once_and_saved(make_client):
+    """Test that concurrent callers near expiry trigger a single refresh."""
+    creds = FakeCreds(timedelta(seconds=10))
+    client = make_client(creds)
+
+    threads = [threading.Thread(target=client._ensure_fresh) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert creds.refresh_calls == 1
+    with open(client.token_file) as f:
+        assert json.load(f) == {"token": "new"}
+
+
+def test_service_account_refresh_does_not_write_token_file(make_client):
+    """Test that service account tokens are refreshed in memory only."""
+    creds = FakeCreds(timedelta(seconds=10))
+    client = make_client(creds)
+    client.auth_mode = "service_account"
+
+    client._ensure_fresh()
+
+    assert creds.refresh_calls == 1
+    assert not os.path.exists(client.token_file)
+
+
+def test_token_inside_google_auth_threshold_is_refreshed_before_transport(
+    make_client, monkeypatch
+):
+    """Test that a token google-auth would refresh itself is refreshed (and saved) first."""
+    from google.oauth2.credentials import Credentials
+
+    refreshes = []
+
+    def fake_refresh(self, request):
+        refreshes.append(request)
+        self.token = "new"
+        self.expiry = _utcnow() + timedelta(hours=1)
+
+    monkeypatch.setattr(Credentials, "refresh", fake_refresh)
+    creds = Credentials(token="old", expiry=_utcnow() + timedelta(minutes=2))
+    client = make_client(creds)
+
+    client._ensure_fresh()
+    assert len(refreshes) == 1
+    with open(client.token_file) as f:
+        assert json.load(f)["token"] == "new"
+
+    # The transport's own check now finds a valid token and does not refresh
+    creds.before_request(object(), "GET", "https://chat.googleapis.com/", {})
+    assert len(refreshes) == 1
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+
+class FakeSpaces:
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def list(self, pageSize, pageToken):
+        self.requested.append(pageToken)
+        return FakeRequest(self.pages[pageToken])
+
+
+class FakeService:
+    def __init__(self, pages):
+        self._spaces = FakeSpaces(pages)
+
+    def spaces(self):
+        return self._spaces
+
+
+def test_iter_spaces_fetches_pages_lazily(make_client):
+    """Test that iter_spaces yields the first page before requesting the next."""
+    client = make_client(FakeCreds(timedelta(hours=1)))
+    client.service = FakeService({
+        "": {"spaces": [{"name": "spaces/A"}], "nextPageToken": "p2"},
+        "p2": {"spaces": [{"name": "spaces/B"}]},
+    })
+    client._execute = lambda request: request.response
+
+    spaces = client.iter_spaces()
+    assert next(spaces)["name"] == "spaces/A"
+    assert client.service.spaces().requested == [""]
+    assert [s["name"] for s in spaces] == ["spaces/B"]
+    assert [s["name"] for s in client.list_spaces()] == ["spaces/A", "spaces/B"]
+
+
+def test_get_messages_batch_chunks_requests(make_client, monkeypatch):
+    """Test that message gets are grouped into batches of at most _BATCH_LIMIT."""
+    from gchat_discourse import google_chat_client
+
+    monkeypatch.setattr(google_chat_client, "_BATCH_LIMIT", 2)
+    batches = []
+
+    class FakeBatch:
+        def __init__(self, callback):
+            self.callback = callback
+            self.ids = []
+            batches.append(self)
+
+        def add(self, request, request_id):
+            self.ids.append(request_id)
+
+        def execute(self):
+            for request_id in self.ids:
+                if request_id.endswith("missing"):
+                    self.callback(request_id, None, Exception("404"))
+                else:
+                    self.callback(request_id, {"name": request_id}, None)
+
+    class FakeMessages:
+        def get(self, name):
+            return name
+
+    class BatchService:
+        def spaces(self):
+            return self
+
+        def messages(self):
+            return FakeMessages()
+
+        def new_batch_http_request(self, callback):
+            return FakeBatch(callback)
+
+    client = make_client(FakeCreds(timedelta(hours=1)))
+    client.service = BatchService()
+    client._execute = lambda request: request.execute()
+
+    names = ["spaces/A/messages/1", "spaces/A/messages/2", "spaces/A/messages/missing"]
+    results = client.get_messages_batch(names)
+
+    assert [b.ids for b in batches] == [names[:2], names[2:]]
+    assert results["spaces/A/messages/1"] == {"name": "spaces/A/messages/1"}
+    assert results["spaces/A/messages/missing"] is None
+
+
+def test_created_after_filter_normalizes_timezone():
+    """Test that naive timestamps are marked UTC and zoned ones are kept."""
+    from gchat_discourse.google_chat_client import created_after_filter
+
+    assert created_after_filter("2024-01-01T00:00:00") == 'createTime > "2024-01-01T00:00:00Z"'
+    assert created_after_filter("2024-01-01T00:00:00Z") == 'createTime > "2024-01-01T00:00:00Z"'
+    assert (
+        created_after_filter("2024-01-01T00:00:00+00:00")
+        == 'createTime > "2024-01-01T00:00:00+00:00"'
+    )
+
+
+def test_is_dm_space_checks_both_type_fields():
+    """Test that DMs are recognized from either the legacy or current type field."""
+    client = object.__new__(GoogleChatClient)
+
+    assert client.is_dm_space({"type": "DM"}) is True
+    assert client.is_dm_space({"spaceType": "DIRECT_MESSAGE"}) is True
+    assert client.is_dm_space({"type": "ROOM", "spaceType": "SPACE"}) is False
+    assert client.is_dm_space({}) is False
+
+
+def test_save_token_replaces_file_without_leftovers(make_client, tmp_path):
+    """Test that saving a token swaps the file in place and leaves no temp files."""
+    client = make_client(FakeCreds(timedelta(hours=1)))
+    (tmp_path / "token.json").write_text('{"token": "stale"}')
+
+    client._save_token()
+
+    assert json.loads((tmp_path / "token.json").read_text()) == {"token": "old"}
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["token.json"]
+
+
+def test_get_latest_message_probes_one_message(make_client):
+    """Test that the latest-message probe requests a single newest-first message."""
+    client = make_client(FakeCreds(timedelta(hours=1)))
+    calls = []
+
+    def fake_list_messages(space_id, page_size=100, page_token=None, filter=None, order_by=None):
+        calls.append((space_id, page_size, order_by))
+        return {"messages": [{"name": "spaces/A/messages/9"}]} if space_id == "spaces/A" else {"messages": []}
+
+    client.list_messages = fake_list_messages
+
+    assert client.get_latest_message("spaces/A") == {"name": "spaces/A/messages/9"}
+    assert client.get_latest_message("spaces/empty") is None
+    assert calls[0] == ("spaces/A", 1, "createTime desc")
+
+
+def test_orjson_model_matches_json_model():
+    """Test that the orjson-backed model round-trips bodies like googleapiclient's JsonModel."""
+    pytest.importorskip("orjson")
+    from googleapiclient.model import JsonModel
+
+    from gchat_discourse.google_chat_client import _OrjsonModel
+
+    body = {"text": "héllo", "thread": {"name": "spaces/A/threads/T"}}
+    model = _OrjsonModel()
+    assert model.deserialize(model.serialize(body)) == body
+    assert model.deserialize(JsonModel().serialize(body).encode("utf-8")) == body
+    assert model.deserialize(b"not json") == "not json"
+
+
+def test_refreshes_reuse_one_auth_request(make_client):
+    """Test that every refresh goes through the client's shared transport request."""
+    creds = FakeCreds(timedelta(seconds=-1))
+    client = make_client(creds)
+    client._ensure_fresh()
+    creds.expiry = _utcnow() - timedelta(seconds=1)
+    client._ensure_fresh()
+    assert creds.refresh_requests == [client._auth_request, client._auth_request]
+
+
+def test_get_spaces_batch_skips_cached_and_fills_cache(make_client):
+    """Test that only uncached spaces are batched and fetched ones are cached."""
+    added = []
+
+    class FakeBatch:
+        def __init__(self, callback):
+            self.callback = callback
+
+        def add(self, request, request_id):
+            added.append(request_id)
+
+        def execute(self):
+            for request_id in added:
+                self.callback(request_id, {"name": request_id}, None)
+
+    class BatchService:
+        def spaces(self):
+            return self
+
+        def get(self, name):
+            return name
+
+        def new_batch_http_request(self, callback):
+            return FakeBatch(callback)
+
+    client = make_client(FakeCreds(timedelta(hours=1)))
+    client.service = BatchService()
+    client._execute = lambda request: request.execute()
+    client._space_cache.set("spaces/A", {"name": "spaces/A", "cached": True})
+
+    results = client.get_spaces_batch(["spaces/A", "spaces/B", "spaces/B"])
+
+    assert added == ["spaces/B"]
+    assert results["spaces/A"]["cached"] is True
+    assert client.get_space("spaces/B") == {"name": "spaces/B"}
+
+
+def test_stored_token_refresh_retries_transport_errors(make_client, monkeypatch):
+    """Test that network errors are retried but a rejected refresh gives up at once."""
+    from google.auth.exceptions import RefreshError, TransportError
+
+    from gchat_discourse import google_chat_client
+
+    sleeps = []
+    monkeypatch.setattr(google_chat_client.time, "sleep", sleeps.append)
+
+    class FlakyCreds(FakeCreds):
+        def __init__(self, errors):
+            super().__init__(timedelta(0))
+            self.errors = list(errors)
+
+        def refresh(self, request):
+            if self.errors:
+                self.refresh_calls += 1
+                raise self.errors.pop(0)
+            super().refresh(request)
+
+    creds = FlakyCreds([TransportError("down"), TransportError("down")])
+    assert make_client(creds)._refresh_stored_token()
+    assert creds.refresh_calls == 3 and sleeps == [0.5, 1.0]
+
+    sleeps.clear()
+    creds = FlakyCreds([RefreshError("invalid_grant")])
+    assert not make_client(creds)._refresh_stored_token()
+    assert creds.refresh_calls == 1 and sleeps == []
@@ -0,0 +1,38 @@
+"""Tests for the space-to-category import helpers."""
+
+from gchat_discourse.import_spaces_as_categories import (
+    _make_unique_truncated_name,
+    _normalize,
+)
+
+
+def test_unique_names_resume_from_suffix_table():
+    """Test that colliding names get increasing suffixes without re-probing used ones."""
+    taken = set()
+    suffixes = {}
+    names = []
+    for desired in ["A" * 60] * 3 + ["Foo", "Foo"]:
+        name = _make_unique_truncated_name(desired, taken, max_len=50, next_suffix=suffixes)
+        taken.add(_normalize(name))
+        names.append(name)
+
+    assert [len(n) for n in names[:3]] == [50, 50, 50]
+    assert names[1].endswith(" (2)") and names[2].endswith(" (3)")
+    assert names[3:] == ["Foo", "Foo (2)"]
+    assert suffixes[_normalize("A" * 50)] == 4
+
+
+def test_unique_names_still_skip_preexisting_suffixes():
+    """Test that a suffix taken by an existing category is not handed out."""
+    taken = {"foo", "foo (3)"}
+    suffixes = {"foo": 3}
+    assert _make_unique_truncated_name("Foo", taken, next_suffix=suffixes) == "Foo (4)"
+
+
+def test_normalize_returns_shared_string_for_repeated_names():
+    """Test that equal names normalize to the same interned object, and None to ''."""
+    first = _normalize("  Team Chat ")
+    second = _normalize("".join(["  team", " chat "]))
+    assert first == "team chat"
+    assert first is second
+    assert _normalize(None) == ""
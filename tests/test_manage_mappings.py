@@ -0,0 +1,19 @@
+"""Tests for the interactive mapping helpers."""
+
+from gchat_discourse.manage_mappings import flatten_category_tree
+
+
+def test_flatten_category_tree_is_depth_first_and_indented():
+    """Test that parents precede children and names are indented by depth."""
+    tree = [
+        {"id": 1, "name": "a", "children": [
+            {"id": 2, "name": "b", "children": [{"id": 3, "name": "c"}]},
+            {"id": 4, "name": "d"},
+        ]},
+        {"id": 5, "name": "e"},
+    ]
+    flat = flatten_category_tree(tree)
+    assert [(c["id"], c["name"]) for c in flat] == [
+        (1, "a"), (2, "  b"), (3, "    c"), (4, "  d"), (5, "e")
+    ]
+    assert flat[2]["raw"] is tree[0]["children"][0]["children"][0]
@@ -0,0 +1,107 @@
+"""Tests for paging through Google Chat messages during sync."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from gchat_discourse.sync_gchat_to_discourse import GChatToDiscourseSync
+
+
+class FakeGChat:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+        self.threads = []
+        self.second_page_requested = threading.Event()
+
+    def list_messages(self, space_id, page_size=100, page_token=None, filter=None):
+        self.calls.append((page_token, filter))
+        self.threads.append(threading.current_thread())
+        if page_token == "p2":
+            self.second_page_requested.set()
+        return self.pages[page_token]
+
+
+def test_next_page_is_prefetched_while_current_page_is_processed():
+    """Test that the following page is requested before the caller finishes the current one."""
+    gchat = FakeGChat({
+        None: {"messages": [{"name": "m1"}], "nextPageToken": "p2"},
+        "p2": {"messages": [{"name": "m2"}]},
+    })
+    sync = object.__new__(GChatToDiscourseSync)
+    sync.gchat = gchat
+    sync._prefetch = ThreadPoolExecutor(max_workers=1)
+
+    pages = sync._iter_message_pages("spaces/A", 'createTime > "x"')
+    assert next(pages) == [{"name": "m1"}]
+    assert gchat.second_page_requested.wait(timeout=5)
+    assert list(pages) == [[{"name": "m2"}]]
+    assert gchat.calls == [(None, 'createTime > "x"'), ("p2", 'createTime > "x"')]
+    # The first page is fetched by the caller, only later pages by a helper
+    assert gchat.threads[0] is threading.current_thread()
+    assert gchat.threads[1] is not threading.current_thread()
+    sync.close()
+
+
+def test_prefetch_thread_is_reused_across_listings():
+    """Test that later listings reuse the same helper thread (and its connection)."""
+    pages = {
+        None: {"messages": [{"name": "m1"}], "nextPageToken": "p2"},
+        "p2": {"messages": [{"name": "m2"}]},
+    }
+    sync = make_sync(pages, FakeDB())
+    for _ in range(3):
+        assert len(list(sync._iter_message_pages("spaces/A"))) == 2
+    helpers = {t for t in sync.gchat.threads if t is not threading.current_thread()}
+    assert len(helpers) == 1
+    sync.close()
+
+
+class FakeDB:
+    def __init__(self, mapped=()):
+        self.mapped = set(mapped)
+        self.last_sync = {}
+
+    def known_message_ids(self, space_id):
+        return frozenset()
+
+    def get_post_id(self, message_id):
+        return 1 if message_id in self.mapped else None
+
+    def update_last_sync_time(self, space_id, timestamp):
+        self.last_sync[space_id] = timestamp
+
+
+def make_sync(pages, db):
+    sync = object.__new__(GChatToDiscourseSync)
+    sync.gchat = FakeGChat(pages)
+    sync.db = db
+    sync._prefetch = ThreadPoolExecutor(max_workers=1)
+    return sync
+
+
+def _message(n, text="hi"):
+    return {"name": f"m{n}", "text": text, "createTime": f"2024-01-01T00:0{n}:00Z"}
+
+
+def test_cursor_stops_before_first_failed_message():
+    """Test that the stored sync time never passes a message that failed to sync."""
+    db = FakeDB(mapped={"m1"})
+    messages = [_message(1), _message(2, text=""), _message(3), _message(4), _message(5)]
+    sync = make_sync({None: {"messages": messages}}, db)
+
+    count = sync._sync_message_pages(
+        "spaces/A", "2024-01-01T00:00:00Z", lambda m: m["name"] in ("m3", "m5")
+    )
+
+    assert count == 2
+    # m1 was already mapped, m2 is empty and m3 synced; m4 failed
+    assert db.last_sync == {"spaces/A": "2024-01-01T00:02:55+00:00"}
+
+
+def test_cursor_is_not_moved_when_listing_returns_nothing():
+    """Test that a lost page (empty listing) leaves the stored sync time alone."""
+    db = FakeDB()
+    sync = make_sync({None: {"messages": []}}, db)
+
+    assert sync._sync_message_pages("spaces/A", "2024-01-01T00:00:00Z", lambda m: True) == 0
+    assert db.last_sync == {}
@@ -0,0 +1,129 @@
+"""Tests for the SyncService coordinator."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from gchat_discourse.__main__ import SyncService
+
+
+class FakeGChat:
+    def __init__(self):
+        self.batches = []
+
+    def get_spaces_batch(self, space_ids):
+        self.batches.append(list(space_ids))
+        return {}
+
+
+def make_service(space_ids):
+    service = SyncService.__new__(SyncService)
+    service._init_lock = threading.RLock()
+    service._gchat_client = FakeGChat()
+    service.config = SimpleNamespace(
+        space_mapping_by_id={sid: {"google_space_id": sid} for sid in space_ids},
+        sync_workers=2,
+    )
+    return service
+
+
+def test_initial_sync_prefetches_every_mapped_space(caplog):
+    """Test that the initial sync batch-fetches the mapped spaces before syncing each one."""
+    service = make_service(["spaces/A", "spaces/B"])
+    synced = []
+    service._sync_one_mapping = lambda mapping: synced.append(mapping["google_space_id"])
+
+    service.initial_sync()
+
+    assert service._gchat_client.batches == [["spaces/A", "spaces/B"]]
+    assert sorted(synced) == ["spaces/A", "spaces/B"]
+    assert "Could not prefetch" not in caplog.text
+
+
+def test_periodic_sync_does_not_prefetch_spaces():
+    """Test that catch-up sweeps leave space fetches to the spaces that need them."""
+    service = make_service(["spaces/A", "spaces/B"])
+    service.db = SimpleNamespace(get_last_sync_times=lambda space_ids: {})
+    synced = []
+    service._catch_up_one_mapping = lambda mapping, last_sync_times: synced.append(mapping)
+
+    service.periodic_sync()
+
+    assert service._gchat_client.batches == []
+    assert len(synced) == 2
+
+
+class FakeListingGChat:
+    """Chat client whose space holds a fixed, oldest-first list of messages."""
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    def get_latest_message(self, space_id):
+        return self.messages[-1]
+
+    def list_messages(self, space_id, page_size=100, page_token=None, filter=None):
+        return {"messages": self.messages}
+
+
+def make_catch_up_service(tmp_path, messages, failing):
+    """Service whose catch-up posts every message except those named in failing."""
+    from gchat_discourse.db import SyncDatabase
+    from gchat_discourse.sync_gchat_to_discourse import GChatToDiscourseSync
+
+    gchat = FakeListingGChat(messages)
+    db = SyncDatabase(str(tmp_path / "sync.sqlite"))
+    handler = object.__new__(GChatToDiscourseSync)
+    handler.gchat = gchat
+    handler.db = db
+    handler._prefetch = ThreadPoolExecutor(max_workers=1)
+    calls = []
+
+    def post(message):
+        if message["name"] in failing:
+            return False
+        db.add_message_post_mapping(message["name"], len(calls) * 10 + 1, "")
+        return True
+
+    def sync_messages_to_posts(space_id, since_timestamp=None):
+        calls.append(since_timestamp)
+        return handler._sync_message_pages(space_id, since_timestamp, post)
+
+    handler.sync_messages_to_posts = sync_messages_to_posts
+
+    service = make_service(["spaces/A"])
+    service._gchat_client = gchat
+    service._gchat_to_discourse = handler
+    service.db = db
+    service.exit_on_error = False
+    return service, calls
+
+
+def _msg(n):
+    return {"name": f"spaces/A/messages/{n}", "text": "hi", "createTime": f"2024-01-01T00:0{n}:00Z"}
+
+
+def test_catch_up_retries_space_held_back_by_failed_message(tmp_path):
+    """Test that a mapped newest message does not hide an older failed one from catch-up."""
+    service, calls = make_catch_up_service(
+        tmp_path, [_msg(1), _msg(2)], failing={"spaces/A/messages/1"}
+    )
+    mapping = {"google_space_id": "spaces/A"}
+
+    service._catch_up_one_mapping(mapping)
+    assert service.db.get_post_id("spaces/A/messages/2") is not None
+
+    service._catch_up_one_mapping(mapping)
+    assert len(calls) == 2
+    service.db.close()
+
+
+def test_catch_up_skips_space_once_cursor_reaches_newest_message(tmp_path):
+    """Test that the probe still skips a space whose messages are all synced."""
+    service, calls = make_catch_up_service(tmp_path, [_msg(1), _msg(2)], failing=set())
+    mapping = {"google_space_id": "spaces/A"}
+
+    service._catch_up_one_mapping(mapping)
+    assert service._catch_up_one_mapping(mapping) == ("spaces/A", 0)
+    assert len(calls) == 1
+    service.db.close()
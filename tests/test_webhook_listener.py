@@ -0,0 +1,42 @@
+"""Tests for the Discourse webhook listener."""
+
+from gchat_discourse.webhook_listener import WebhookListener
+
+
+def test_webhook_dispatches_post_event():
+    """Test that a JSON webhook body is parsed and routed to the post handler."""
+    listener = WebhookListener()
+    received = []
+    listener.register_post_handler(lambda event, post: received.append((event, post["id"])))
+
+    response = listener.app.test_client().post(
+        "/discourse-webhook",
+        data=b'{"post":{"id":5,"raw":"hi"}}',
+        headers={"X-Discourse-Event-Type": "post", "X-Discourse-Event": "post_created"},
+    )
+
+    assert response.status_code == 200
+    assert received == [("created", 5)]
+
+
+def test_webhook_rejects_empty_body():
+    """Test that an empty webhook body is answered with 400."""
+    listener = WebhookListener()
+    response = listener.app.test_client().post("/discourse-webhook", data=b"")
+    assert response.status_code == 400
+
+
+def test_shutdown_stops_run():
+    """Test that shutdown() from another thread makes run() return."""
+    import threading
+    import time
+
+    listener = WebhookListener(host="127.0.0.1", port=0)
+    thread = threading.Thread(target=listener.run)
+    thread.start()
+    while listener._server is None:
+        time.sleep(0.01)
+
+    listener.shutdown()
+    thread.join(timeout=5)
+    assert not thread.is_alive()